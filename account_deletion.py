@@ -0,0 +1,80 @@
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+from database import db
+from jobs import JOBS
+from models.auth import AuthModel
+from models.book_comment_days import BookCommentDayModel
+from models.books import BooksModel
+from models.comments import CommentsModel
+from response_cache import BOOK_CACHE, invalidate_book
+from routers.comments import adjust_comment_count
+from security.tokens import TOKEN_VERSIONS
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _delete_ids(model, ids):
+    db.session.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+
+
+def _advance(job, key, count):
+    job.progress = {**job.progress, key: job.progress.get(key, 0) + count}
+
+
+@JOBS.handler("delete_account")
+def delete_account(job):
+    """Remove a user scheduled for deletion, one batch of rows per call.
+
+    Order matters because users, books and comments have no ON DELETE rules:
+    the user's comments, then other users' comments on the user's books, then
+    the books, and finally the user row.
+    """
+    user_id = job.payload["user_id"]
+    batch_size = current_app.config.get("ACCOUNT_DELETION_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+    rows = db.session.execute(
+        select(CommentsModel.id, CommentsModel.book_id, CommentsModel.created_at)
+        .where(CommentsModel.user_id == user_id)
+        .order_by(CommentsModel.id)
+        .limit(batch_size)
+    ).all()
+    if rows:
+        _delete_ids(CommentsModel, [row.id for row in rows])
+        days = {}
+        for row in rows:
+            days.setdefault(row.book_id, Counter())[row.created_at.date()] -= 1
+        for book_id, counts in days.items():
+            adjust_comment_count(book_id, counts)
+            invalidate_book(book_id)
+        _advance(job, "comments", len(rows))
+        return False
+
+    comment_ids = db.session.execute(
+        select(CommentsModel.id)
+        .join(BooksModel, CommentsModel.book_id == BooksModel.id)
+        .where(BooksModel.user_id == user_id)
+        .order_by(CommentsModel.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if comment_ids:
+        _delete_ids(CommentsModel, comment_ids)
+        _advance(job, "comments_on_books", len(comment_ids))
+        return False
+
+    book_ids = db.session.execute(
+        select(BooksModel.id).where(BooksModel.user_id == user_id).order_by(BooksModel.id).limit(batch_size)
+    ).scalars().all()
+    if book_ids:
+        db.session.execute(delete(BookCommentDayModel).where(BookCommentDayModel.book_id.in_(book_ids)))
+        _delete_ids(BooksModel, book_ids)
+        invalidate_book()
+        _advance(job, "books", len(book_ids))
+        return False
+
+    db.session.execute(delete(AuthModel).where(AuthModel.id == user_id).execution_options(synchronize_session=False))
+    TOKEN_VERSIONS.discard(user_id)
+    BOOK_CACHE.clear()
+    return True
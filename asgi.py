@@ -0,0 +1,343 @@
+"""ASGI entry point: async read path for the catalog, Flask for everything else.
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+GET /books, /books/<id>, /comments and /comment/<id> are answered here with
+async SQLAlchemy sessions (asyncpg on Postgres, aiosqlite on SQLite), so one
+worker keeps many reads waiting on the database at once. Like the Flask reads,
+each request goes to a healthy DATABASE_REPLICA_URLS replica picked by REPLICAS,
+which takes a failing replica out of rotation; the read is then retried once on
+the primary. They reuse the
+models, the query argument schemas and serialization.py, so the bodies match
+the Flask endpoints; book reads go through BOOK_CACHE and every answer is
+compressed as COMPRESSION would. Every other request, and NDJSON streaming, is
+passed to `main.app` on a thread pool, the same app gunicorn's post_fork sets up.
+
+Needs the optional packages in requirements-async.txt (`uvicorn`, `a2wsgi`,
+`greenlet`, and the async drivers `asyncpg` and `aiosqlite`):
+
+    pip install -r requirements-async.txt
+"""
+import asyncio
+import os
+import re
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs
+
+from marshmallow import ValidationError
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from werkzeug.http import http_date, parse_accept_header
+
+try:
+    from a2wsgi import WSGIMiddleware
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError:
+    raise RuntimeError("The async read path needs its optional packages: pip install -r requirements-async.txt")
+
+from compression import COMPRESSION, compress
+from database import engine_options_from_env
+from instrumentation import REQUEST_LATENCY, REQUESTS
+from logging_config import get_module_logger
+from main import app as flask_app
+from models.books import BooksModel
+from models.comments import CommentsModel
+from pagination import decode_cursor, page_headers, split_page
+from ratelimit import RATE_LIMITER, request_identity, too_many_requests
+from replicas import REPLICAS
+from response_cache import BOOK_CACHE, MemoryCacheBackend, book_key, entity_tag
+from schemas.books import BookQueryArgsSchema, BookViewArgsSchema
+from schemas.comments import CommentQueryArgsSchema
+from serialization import (
+    BOOK_DETAIL_COLUMNS, BOOK_SUMMARY_COLUMNS, comment_rows, comments_for_books, dump_books, dump_comment,
+    group_comments,
+)
+
+logger = get_module_logger(__file__)
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+WSGI_THREADS = int(os.getenv("ASYNC_WSGI_THREADS", 10))
+
+
+def async_database_url(database_url):
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+class HTTPError(Exception):
+    def __init__(self, code, message=None, errors=None):
+        self.code = code
+        self.message = message
+        self.errors = errors
+
+
+def load_args(schema, query):
+    try:
+        return schema.load({key: values[0] for key, values in query.items()})
+    except ValidationError as e:
+        raise HTTPError(422, errors={"query": e.messages})
+
+
+async def fetch_page(session, statement, key_column, limit, cursor):
+    if cursor:
+        try:
+            statement = statement.where(key_column > decode_cursor(cursor))
+        except ValueError:
+            raise HTTPError(400, message="Invalid cursor")
+    rows = (await session.execute(statement.order_by(key_column).limit(limit + 1))).all()
+    return split_page(rows, limit, key_column.key)
+
+
+async def dump_book_rows(session, rows, view):
+    comments = None
+    if view == "full" and rows:
+        ids = [row[0] for row in rows]
+        comments = group_comments(await session.execute(comments_for_books(ids)), ids)
+    return dump_books(rows, view, comments)
+
+
+async def list_books(session, request):
+    args = load_args(BookQueryArgsSchema(), request["query"])
+    rows, next_cursor = await fetch_page(
+        session, select(*BOOK_SUMMARY_COLUMNS), BooksModel.id, args["limit"], args.get("cursor")
+    )
+    logger.info(f"GET /books - {len(rows)} books fetched")
+    headers = page_headers(request["base_url"], request["args"], next_cursor, args["limit"])
+    return await dump_book_rows(session, rows, args["view"]), headers
+
+
+async def get_book(session, request, book_id):
+    args = load_args(BookViewArgsSchema(), request["query"])
+    row = (await session.execute(select(*BOOK_DETAIL_COLUMNS).where(BooksModel.id == int(book_id)))).first()
+    if row is None:
+        raise HTTPError(404)
+    logger.info(f"Book fetched with ID: {book_id}")
+    return (await dump_book_rows(session, [row], args["view"]))[0], {}, row.version
+
+
+async def list_comments(session, request):
+    args = load_args(CommentQueryArgsSchema(), request["query"])
+    statement = comment_rows()
+    if "book_id" in args:
+        statement = statement.where(CommentsModel.book_id == args["book_id"])
+    if "user_id" in args:
+        statement = statement.where(CommentsModel.user_id == args["user_id"])
+    if "since" in args:
+        statement = statement.where(CommentsModel.created_at >= args["since"])
+    rows, next_cursor = await fetch_page(session, statement, CommentsModel.id, args["limit"], args.get("cursor"))
+    logger.info(f"GET /comments - {len(rows)} comments fetched")
+    headers = page_headers(request["base_url"], request["args"], next_cursor, args["limit"])
+    return [dump_comment(row) for row in rows], headers
+
+
+async def get_comment(session, request, comment_id):
+    row = (await session.execute(comment_rows(CommentsModel.version).where(CommentsModel.id == int(comment_id)))).first()
+    if row is None:
+        raise HTTPError(404)
+    logger.info(f"Comment fetched with ID: {comment_id}")
+    return dump_comment(row), {}, row.version
+
+
+def books_key(request):
+    return BOOK_CACHE.list_key("books", request["pairs"])
+
+
+def book_detail_key(request, book_id):
+    return book_key(book_id, load_args(BookViewArgsSchema(), request["query"])["view"])
+
+
+# (pattern, Flask endpoint name, handler, BOOK_CACHE key builder). Book bodies are cached
+# and written the way BOOK_CACHE.respond writes them, comment bodies the way flask-smorest
+# does. Handlers return (data, headers[, row version]); single rows get the same versioned
+# ETag as in Flask.
+ROUTES = [
+    (re.compile(r"/books"), "Books.Book", list_books, books_key),
+    (re.compile(r"/books/(\d+)"), "Books.BookDetails", get_book, book_detail_key),
+    (re.compile(r"/comments"), "Comments.Comments", list_comments, None),
+    (re.compile(r"/comment/(\d+)"), "Comments.CommentsDetail", get_comment, None),
+]
+
+
+class AsyncReadApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=WSGI_THREADS)
+        self.engine = None
+        self.sessions = None
+        self.replica_engines = {}
+        self.replica_sessions = {}
+
+    @staticmethod
+    def create_engine(database_url):
+        options = engine_options_from_env(database_url)
+        options.pop("poolclass", None)
+        return create_async_engine(async_database_url(database_url), **options)
+
+    def start(self):
+        self.engine = self.create_engine(self.flask_app.config["SQLALCHEMY_DATABASE_URI"])
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        binds = self.flask_app.config.get("SQLALCHEMY_BINDS") or {}
+        for name in REPLICAS.names:
+            engine = self.replica_engines[name] = self.create_engine(binds[name]["url"])
+            REPLICAS.watch(engine.sync_engine, name)
+            self.replica_sessions[name] = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def stop(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+        for engine in self.replica_engines.values():
+            await engine.dispose()
+
+    async def read(self, handler, request, params):
+        """Run a read handler on the replica REPLICAS picks, retrying once on the primary if it fails."""
+        replica = REPLICAS.pick()
+        if replica is not None:
+            try:
+                async with self.replica_sessions[replica]() as session:
+                    return await handler(session, request, *params)
+            except DBAPIError:
+                if not REPLICAS.is_down(replica):
+                    raise
+        async with self.sessions() as session:
+            return await handler(session, request, *params)
+
+    def match(self, scope):
+        if scope["method"] != "GET":
+            return None
+        for pattern, endpoint, handler, cache_key in ROUTES:
+            found = pattern.fullmatch(scope["path"])
+            if found:
+                return endpoint, handler, cache_key, found.groups()
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+
+        route = self.match(scope) if scope["type"] == "http" else None
+        headers = {key.decode("latin1").lower(): value.decode("latin1") for key, value in scope.get("headers", ())}
+        if route is None or "application/x-ndjson" in headers.get("accept", ""):
+            return await self.wsgi(scope, receive, send)
+        if self.engine is None:
+            self.start()
+
+        endpoint, handler, cache_key, params = route
+        start = time.perf_counter()
+        query = parse_qs(scope["query_string"].decode("latin1"), keep_blank_values=True)
+        host = headers.get("host", "localhost")
+        request = {
+            "query": query,
+            "args": {key: values[0] for key, values in query.items()},
+            "pairs": [(key, value) for key, values in query.items() for value in values],
+            "base_url": f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}{scope['path']}",
+        }
+        etag = None
+        retry_after = self.rate_limited(endpoint, headers, scope)
+        if retry_after is not None:
+            status, extra_headers = 429, {"Retry-After": retry_after}
+            body = self.dumps(too_many_requests())
+        else:
+            try:
+                if cache_key is not None:
+                    entry = await self.cached_entry(cache_key, handler, request, params)
+                    status, body, etag = 200, entry["body"].encode(), entry["etag"]
+                    extra_headers = {**entry["headers"], "Last-Modified": http_date(entry["last_modified"])}
+                else:
+                    data, extra_headers, *version = await self.read(handler, request, params)
+                    status, body = 200, self.dumps(data)
+                    etag = entity_tag(body, *version) if version else None
+            except HTTPError as e:
+                status, extra_headers = e.code, {}
+                body = self.dumps(self.error_body(e))
+
+        response_headers = {"Content-Type": "application/json", **extra_headers}
+        if etag is not None:
+            response_headers["ETag"] = f'"{etag}"'
+            if_none_match = {tag.strip().removeprefix("W/").strip('"') for tag in headers.get("if-none-match", "").split(",")}
+            if etag in if_none_match or "*" in if_none_match:
+                status, body = 304, b""
+        if status != 304:
+            body = self.compress(body, headers, response_headers)
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(key.encode("latin1"), str(value).encode("latin1")) for key, value in response_headers.items()]
+                       + [(b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+        REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, method="GET")
+        REQUESTS.inc(endpoint=endpoint, method="GET", status=status)
+
+    def rate_limited(self, endpoint, headers, scope):
+        """Apply the limits declared on the Flask view, as its before_request hook would."""
+        if RATE_LIMITER.store is None:
+            return None
+        limits = RATE_LIMITER.limits_for(self.flask_app, endpoint, "GET")
+        if not limits:
+            return None
+        remote_addr = (scope.get("client") or ("unknown",))[0]
+        with self.flask_app.app_context():
+            identity = request_identity(headers.get("authorization"), remote_addr)
+        return RATE_LIMITER.retry_after(endpoint, "GET", limits, identity, remote_addr)
+
+    async def cached_entry(self, cache_key, handler, request, params):
+        """The BOOK_CACHE entry for a book read, building and storing it on a miss."""
+        key = await self.cache_call(cache_key, request, *params)
+        entry = await self.cache_call(BOOK_CACHE.entry, key)
+        if entry is None:
+            data, headers, *version = await self.read(handler, request, params)
+            body = self.flask_app.json.dumps(data) + "\n"
+            entry = await self.cache_call(BOOK_CACHE.store, key, body, headers, *version)
+        return entry
+
+    @staticmethod
+    async def cache_call(func, *args):
+        # The memory backend answers at once; Redis calls block, so they leave the event loop.
+        if BOOK_CACHE.backend is None or isinstance(BOOK_CACHE.backend, MemoryCacheBackend):
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    @staticmethod
+    def compress(body, headers, response_headers):
+        """Compress a JSON body the way COMPRESSION's after_request hook does."""
+        if not COMPRESSION.encodings:
+            return body
+        response_headers["Vary"] = "Accept-Encoding"
+        if len(body) < COMPRESSION.min_size:
+            return body
+        encoding = COMPRESSION.negotiate(parse_accept_header(headers.get("accept-encoding")))
+        if encoding is None:
+            return body
+        response_headers["Content-Encoding"] = encoding
+        if "ETag" in response_headers:
+            response_headers["ETag"] = "W/" + response_headers["ETag"]
+        return compress(body, encoding)
+
+    def dumps(self, data):
+        return (self.flask_app.json.dumps(data, separators=(",", ":")) + "\n").encode()
+
+    @staticmethod
+    def error_body(error):
+        body = {"code": error.code, "status": HTTPStatus(error.code).phrase}
+        if error.message:
+            body["message"] = error.message
+        if error.errors:
+            body["errors"] = error.errors
+        return body
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = AsyncReadApp(flask_app)
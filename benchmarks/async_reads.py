@@ -0,0 +1,132 @@
+"""Compare concurrent read throughput of threaded gunicorn workers and the async read path.
+
+Usage: python -m benchmarks.async_reads [--workers N] [--concurrency N] [--requests N]
+                                        [--books N] [--comments-per-book N]
+
+Starts `gunicorn main:app` (gthread workers, from gunicorn.conf.py) and then
+`gunicorn -k uvicorn.workers.UvicornWorker asgi:app` with the same worker
+count on a local port, and drives each with the same mix of GET /books,
+/books/<id>, /comments and /comment/<id> from --concurrency client threads.
+The book response cache is disabled so every request reaches the database.
+Run it against Postgres (DATABASE_URL) to see the effect of waiting on the
+database; on SQLite most of the time is CPU.
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.harness import app, percentile, seed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "threaded": ["main:app"],
+    "async": ["-k", "uvicorn.workers.UvicornWorker", "asgi:app"],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"Server on port {port} did not start")
+
+
+def start_server(kind, workers, port):
+    env = dict(os.environ, BOOK_CACHE_BACKEND="none", GUNICORN_WORKERS=str(workers),
+               GUNICORN_BIND=f"127.0.0.1:{port}", APP_CONFIG="bench")
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", *SERVERS[kind]],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_up(port)
+    return server
+
+
+def request_paths(books, comments, count, seed_value):
+    rng = random.Random(seed_value)
+    paths = []
+    for _ in range(count):
+        pick = rng.random()
+        if pick < 0.4:
+            paths.append(f"/books?limit=20&view={rng.choice(['full', 'summary'])}")
+        elif pick < 0.7:
+            paths.append(f"/books/{rng.randint(1, books)}")
+        elif pick < 0.9:
+            paths.append(f"/comments?book_id={rng.randint(1, books)}")
+        else:
+            paths.append(f"/comment/{rng.randint(1, comments)}")
+    return paths
+
+
+def drive(port, paths, concurrency):
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        local, failed = [], 0
+        for path in chunk:
+            start = time.perf_counter()
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            failed += response.status >= 400
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(paths[i::concurrency],)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(errors), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--comments-per-book", type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(50, args.books, args.comments_per_book)
+    paths = request_paths(args.books, args.books * args.comments_per_book, args.requests, 0)
+
+    print(f"{args.workers} workers, {args.concurrency} concurrent clients, {args.requests} requests")
+    for kind in SERVERS:
+        port = free_port()
+        server = start_server(kind, args.workers, port)
+        try:
+            drive(port, paths[:200], args.concurrency)  # warm up pools and imports
+            latencies, errors, elapsed = drive(port, paths, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{kind:>8}: {len(latencies) / elapsed:8.1f} req/s  p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
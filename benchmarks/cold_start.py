@@ -0,0 +1,61 @@
+"""Measure how long a fresh interpreter takes to import main and build the app.
+
+Usage: python -m benchmarks.cold_start [--runs N] [--config prod|test|bench] [--budget-ms MS]
+
+Every run starts a new Python process, so module import costs are included.
+Exits with status 1 when the median exceeds --budget-ms, so CI can keep worker
+startup from regressing; tests/test_cold_start.py holds the prod config to the
+default budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 1500
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.create_app({config!r})
+built = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - start) * 1000, "create_app_ms": (built - imported) * 1000}}))
+"""
+
+
+def measure(config):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+    result = subprocess.run([sys.executable, "-c", PROBE.format(config=config)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--config", default="prod")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    runs = [measure(args.config) for _ in range(args.runs)]
+    imports = statistics.median(run["import_ms"] for run in runs)
+    builds = statistics.median(run["create_app_ms"] for run in runs)
+    total = statistics.median(run["import_ms"] + run["create_app_ms"] for run in runs)
+
+    print(f"import main:  {imports:8.1f} ms (median of {args.runs})")
+    print(f"create_app(): {builds:8.1f} ms")
+    print(f"total:        {total:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if total > args.budget_ms:
+        print("Cold start is over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
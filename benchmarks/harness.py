@@ -0,0 +1,85 @@
+"""Shared setup for the benchmark scripts.
+
+Importing this module points the app at DATABASE_URL when it is set, or at a
+throwaway SQLite file otherwise. `app` is built with the bench config on first
+access, so the tests can reuse seed() with their own app.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+os.environ.setdefault("REVOCATION_BACKEND", "memory")
+
+from datetime import datetime, timezone  # noqa: E402
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from main import create_app  # noqa: E402
+from database import db  # noqa: E402
+from models import AuthModel, BookCommentDayModel, BooksModel, CommentsModel  # noqa: E402
+from security.auth import hash_password  # noqa: E402
+
+BENCH_PASSWORD = "benchmark-password"
+INSERT_BATCH = 10000
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction + 0.5) - 1)] if values else 0.0
+
+
+def seed(users, books, comments_per_book):
+    """Create tables and bulk-load users, books and comments unless books already exist.
+
+    Every user is `user-<n>` with password BENCH_PASSWORD. Call inside an app context.
+    """
+    db.create_all()
+    if db.session.query(BooksModel.id).first() is not None:
+        return
+
+    password = hash_password(BENCH_PASSWORD)
+    db.session.execute(insert(AuthModel), [
+        {"id": i, "username": f"user-{i}", "email": f"user-{i}@example.com", "password": password}
+        for i in range(1, users + 1)
+    ])
+    db.session.execute(insert(BooksModel), [
+        {"id": i, "name": f"book-{i}", "author": f"user-{i % users + 1}", "user_id": i % users + 1,
+         "comment_count": comments_per_book}
+        for i in range(1, books + 1)
+    ])
+    rows = []
+    for book_id in range(1, books + 1):
+        for n in range(comments_per_book):
+            rows.append({"comment": f"comment {n}", "book_id": book_id, "user_id": (book_id + n) % users + 1})
+        if len(rows) >= INSERT_BATCH:
+            db.session.execute(insert(CommentsModel), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(CommentsModel), rows)
+    if comments_per_book:
+        today = datetime.now(timezone.utc).date()
+        db.session.execute(insert(BookCommentDayModel), [
+            {"book_id": i, "day": today, "comments": comments_per_book} for i in range(1, books + 1)
+        ])
+    db.session.commit()
+
+    if db.engine.dialect.name == "postgresql":
+        for table in ("users", "books", "comments"):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+
+_app = None
+
+
+def __getattr__(name):
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app("bench")
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
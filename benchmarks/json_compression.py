@@ -0,0 +1,64 @@
+"""Measure JSON encode time per provider and bytes sent per Content-Encoding.
+
+Usage: python -m benchmarks.json_compression [--books N] [--comments-per-book N] [--rounds N]
+
+Encodes the whole seeded catalog (full view, as GET /books pages and the NDJSON
+dump return it) with the stdlib and orjson providers, then compresses the
+orjson bytes with every available encoding, both in one shot and as a chunked
+NDJSON stream flushed every STREAM_CHUNK_SIZE rows.
+"""
+import argparse
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.harness import app, seed
+from compression import COMPRESSORS, compress, compress_stream
+from json_provider import OrjsonProvider
+from models import BooksModel
+from pagination import STREAM_CHUNK_SIZE
+from routers.books import book_summaries
+from serialization import dump_books
+
+
+def timed(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+    return result, (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--comments-per-book", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(50, args.books, args.comments_per_book)
+        catalog = dump_books(book_summaries().order_by(BooksModel.id).all(), "full")
+
+    print(f"{len(catalog)} books\n")
+    print(f"{'provider':>9} {'encode ms':>10} {'bytes':>12}")
+    for name, provider in (("stdlib", DefaultJSONProvider(app)), ("orjson", OrjsonProvider(app))):
+        body, seconds = timed(lambda: provider.dumps(catalog).encode(), args.rounds)
+        print(f"{name:>9} {seconds * 1000:>10.1f} {len(body):>12,}")
+
+    provider = OrjsonProvider(app)
+    body = provider.dumps_bytes(catalog)
+    chunks = [
+        b"".join(provider.dumps_bytes(book) + b"\n" for book in catalog[i:i + STREAM_CHUNK_SIZE])
+        for i in range(0, len(catalog), STREAM_CHUNK_SIZE)
+    ]
+    print(f"\n{'encoding':>9} {'compress ms':>12} {'bytes':>12} {'ratio':>7} {'stream ms':>10} {'stream bytes':>13}")
+    print(f"{'identity':>9} {0:>12.1f} {len(body):>12,} {1:>7.1f} {0:>10.1f} {sum(map(len, chunks)):>13,}")
+    for encoding in COMPRESSORS:
+        compressed, seconds = timed(lambda: compress(body, encoding), args.rounds)
+        streamed, stream_seconds = timed(lambda: b"".join(compress_stream(chunks, encoding)), args.rounds)
+        print(f"{encoding:>9} {seconds * 1000:>12.1f} {len(compressed):>12,} {len(body) / len(compressed):>7.1f} "
+              f"{stream_seconds * 1000:>10.1f} {len(streamed):>13,}")
+
+
+if __name__ == "__main__":
+    main()
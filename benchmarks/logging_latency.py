@@ -0,0 +1,49 @@
+"""Compare request latency with module logging enabled and disabled.
+
+Usage: python -m benchmarks.logging_latency [--requests N]
+
+Runs against a throwaway SQLite database through Flask's test client, so the
+numbers isolate in-process overhead rather than network or Postgres time.
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.harness import app, percentile, seed
+
+BOOKS = 50
+
+
+def measure(client, requests):
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        client.get(f"/books/{i % BOOKS + 1}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(percentile(latencies, 0.5), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(10, BOOKS, 0)
+    client = app.test_client()
+    measure(client, 200)
+
+    logging_on = measure(client, args.requests)
+    logging.disable(logging.CRITICAL)
+    logging_off = measure(client, args.requests)
+    logging.disable(logging.NOTSET)
+
+    print(f"logging on : {logging_on}")
+    print(f"logging off: {logging_off}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Measure login throughput under concurrent load, inline vs process-pool hashing.
+
+Usage: python -m benchmarks.login_throughput [--threads N] [--logins N]
+
+Threads stand in for the request threads of one gthread gunicorn worker
+(gunicorn.conf.py). While logins are running, a second group of threads hits
+GET /books/<id> to show how much hashing slows down the other endpoints.
+"""
+import argparse
+import os
+import threading
+import time
+
+os.environ.setdefault("BOOK_CACHE_BACKEND", "none")
+
+from benchmarks.harness import BENCH_PASSWORD, app, percentile, seed  # noqa: E402
+import security.auth as password_hashing  # noqa: E402
+
+
+def run(threads, logins):
+    login_latencies, read_latencies, statuses = [], [], []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def login_worker():
+        client = app.test_client()
+        for _ in range(logins):
+            start = time.perf_counter()
+            response = client.post("/login", json={"username": "user-1", "password": BENCH_PASSWORD})
+            with lock:
+                login_latencies.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+
+    def read_worker():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get("/books/1")
+            with lock:
+                read_latencies.append(time.perf_counter() - start)
+
+    readers = [threading.Thread(target=read_worker) for _ in range(2)]
+    writers = [threading.Thread(target=login_worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    ok = statuses.count(200)
+    return {
+        "logins_per_sec": round(ok / elapsed, 1),
+        "login_p50_ms": round(percentile(login_latencies, 0.5) * 1000, 1),
+        "login_p99_ms": round(percentile(login_latencies, 0.99) * 1000, 1),
+        "rejected_429": statuses.count(429),
+        "reads_p99_ms": round(percentile(read_latencies, 0.99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--pool-workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(1, 1, 0)
+    for label, workers in (("inline", 0), (f"process pool x{args.pool_workers}", args.pool_workers)):
+        password_hashing.PASSWORD_HASH_WORKERS = workers
+        print(f"{label:>20}: {run(args.threads, args.logins)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Seed a large catalog and check that the hot comment reads use indexes.
+
+Usage: python -m benchmarks.query_plans [--books N] [--comments-per-book N]
+
+Builds the schema with the migrations (`flask db upgrade`), so the indexes
+checked are the ones production gets, then sends the read requests that hit
+the comments table and EXPLAINs every statement they issue against it.
+Points at DATABASE_URL when set, otherwise at a throwaway SQLite file. Exits
+non-zero if any plan falls back to a scan of the comments table.
+tests/test_query_plans.py runs the same check on a smaller catalog.
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+
+from sqlalchemy import event
+
+from benchmarks import harness
+from database import db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(ROOT, "migrations")
+
+# Endpoints whose statements read the comments table; seeded ids and usernames.
+HOT_ENDPOINTS = {
+    "book comment page": "/books/1/comments?limit=20",
+    "user comment feed": "/users/user-2/comments?limit=20",
+    "comments of a book": "/comments?book_id=1",
+    "books page with comments (selectin)": "/books?limit=20",
+}
+
+COMMENTS_SCAN = {
+    "postgresql": re.compile(r"Seq Scan on comments\b"),
+    # A SCAN, even USING INDEX, walks the whole table; SEARCH looks rows up.
+    "sqlite": re.compile(r"^SCAN comments\b", re.MULTILINE),
+}
+
+
+def _run_migrations(app, command, revision):
+    from flask_migrate import Migrate
+
+    if "migrate" not in app.extensions:
+        Migrate(app, db, directory=MIGRATIONS_DIR)
+    # alembic's env.py runs logging.config.fileConfig(), which disables every
+    # logger it does not name; leave the app's loggers as they were.
+    disabled = {logger: logger.disabled for logger in logging.root.manager.loggerDict.values()
+                if isinstance(logger, logging.Logger)}
+    with app.app_context():
+        command(directory=MIGRATIONS_DIR, revision=revision)
+    for logger, was_disabled in disabled.items():
+        logger.disabled = was_disabled
+
+
+def migrate(app):
+    """Bring the app's database to the latest migration."""
+    from flask_migrate import upgrade
+
+    _run_migrations(app, upgrade, "head")
+
+
+def unmigrate(app):
+    """Undo every migration, dropping the tables they created."""
+    from flask_migrate import downgrade
+
+    _run_migrations(app, downgrade, "base")
+
+
+def endpoint_statements(app, path):
+    """The SELECTs on the comments table that GET path issues, with their parameters."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and re.search(r"\bcomments\b", statement):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = app.test_client().get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {path} answered {response.status_code}")
+    return statements
+
+
+def hot_statements(app):
+    """{label: (statement, parameters)} for every comments read of HOT_ENDPOINTS."""
+    found = {}
+    for name, path in HOT_ENDPOINTS.items():
+        statements = endpoint_statements(app, path)
+        for number, statement in enumerate(statements, 1):
+            found[name if len(statements) == 1 else f"{name} #{number}"] = statement
+    return found
+
+
+def explain(statement, parameters):
+    """(scans_comments, plan) for a statement as the driver received it. Call inside an app context."""
+    dialect = db.engine.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    rows = db.session.connection().exec_driver_sql(prefix + statement, parameters).all()
+    plan = "\n".join(str(row[-1]) for row in rows)
+    return bool(COMMENTS_SCAN[dialect].search(plan)), plan
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--comments-per-book", type=int, default=10)
+    args = parser.parse_args()
+
+    app = harness.app
+    migrate(app)
+    with app.app_context():
+        harness.seed(100, args.books, args.comments_per_book)
+    failures = 0
+    for name, (statement, parameters) in hot_statements(app).items():
+        with app.app_context():
+            scans, plan = explain(statement, parameters)
+            db.session.rollback()
+        print(f"[{'SCAN' if scans else 'ok'}] {name}\n    " + plan.replace("\n", "\n    "))
+        failures += scans
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
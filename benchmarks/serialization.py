@@ -0,0 +1,76 @@
+"""Compare BookSchema (marshmallow) and serialization.dump_books on large listings.
+
+Usage: python -m benchmarks.serialization [--books N] [--comments-per-book N] [--page N] [--rounds N]
+
+For both views it loads a page of books each way, checks that the JSON bodies
+are byte-for-byte identical, and reports rows/sec for serialization alone and
+for query plus serialization. Exits non-zero if the bodies ever differ.
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.harness import app, db, seed
+from models import BooksModel
+from routers.books import book_summaries, books_for_view, present_books
+from schemas.books import BookSchema
+from serialization import dump_books
+
+
+def schema_path(view, page):
+    start = time.perf_counter()
+    books = books_for_view(view).order_by(BooksModel.id).limit(page).all()
+    loaded = time.perf_counter()
+    body = app.json.dumps(BookSchema(many=True).dump(present_books(books, view)))
+    return body, time.perf_counter() - loaded, time.perf_counter() - start
+
+
+def fast_path(view, page):
+    start = time.perf_counter()
+    rows = book_summaries().order_by(BooksModel.id).limit(page).all()
+    loaded = time.perf_counter()
+    # dump_books also runs the comments query for the full view, so its
+    # serialization time includes that round trip.
+    body = app.json.dumps(dump_books(rows, view))
+    return body, time.perf_counter() - loaded, time.perf_counter() - start
+
+
+def measure(path, view, page, rounds):
+    serialize = total = 0.0
+    body = None
+    for _ in range(rounds):
+        body, serialize_time, total_time = path(view, page)
+        serialize += serialize_time
+        total += total_time
+        db.session.expunge_all()
+    rows = page * rounds
+    return body, rows / serialize, rows / total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--comments-per-book", type=int, default=5)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    mismatches = 0
+    with app.app_context():
+        seed(50, args.books, args.comments_per_book)
+        print(f"{'view':>8} {'path':>11} {'serialize rows/s':>17} {'query+serialize rows/s':>23}")
+        for view in ("summary", "full"):
+            expected, schema_ser, schema_total = measure(schema_path, view, args.page, args.rounds)
+            body, fast_ser, fast_total = measure(fast_path, view, args.page, args.rounds)
+            print(f"{view:>8} {'marshmallow':>11} {schema_ser:>17,.0f} {schema_total:>23,.0f}")
+            print(f"{view:>8} {'fast':>11} {fast_ser:>17,.0f} {fast_total:>23,.0f}")
+            if body != expected:
+                print(f"{view:>8} MISMATCH: fast output differs from BookSchema output")
+                mismatches += 1
+            else:
+                print(f"{view:>8} identical ({len(body)} bytes), x{fast_total / schema_total:.1f} end to end")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
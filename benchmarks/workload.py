@@ -0,0 +1,202 @@
+"""Replay a mixed BookVerse workload and record throughput, latency and SQL per request.
+
+Usage:
+    python -m benchmarks.workload [--users N] [--books N] [--comments-per-book N]
+                                  [--requests N] [--concurrency N]
+                                  [--mix reads=70,comments=15,logins=5,profiles=10]
+                                  [--output results.json] [--compare baseline.json]
+
+The app is built with create_app("bench") through Flask's test client, against DATABASE_URL
+or a throwaway SQLite file (see benchmarks/harness.py). Results are written as
+JSON tagged with the current git commit so runs can be compared across commits
+with --compare.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from benchmarks.harness import BENCH_PASSWORD, app, db, percentile, seed
+
+DEFAULT_MIX = "reads=70,comments=15,logins=5,profiles=10"
+
+_local = threading.local()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_statement(*args):
+    _local.statements = getattr(_local, "statements", 0) + 1
+
+
+def scenario_reads(client, ctx, rng):
+    if rng.random() < 0.5:
+        return client.get(f"/books?limit=20&view={rng.choice(['full', 'summary'])}")
+    return client.get(f"/books/{rng.randint(1, ctx['books'])}")
+
+
+def scenario_comments(client, ctx, rng):
+    user_id = rng.randint(1, ctx["users"])
+    return client.post(
+        "/comments",
+        json={"comment": "benchmark comment", "book_id": rng.randint(1, ctx["books"])},
+        headers={"Authorization": f"Bearer {ctx['tokens'][user_id]}"},
+    )
+
+
+def scenario_logins(client, ctx, rng):
+    return client.post("/login", json={"username": f"user-{rng.randint(1, ctx['users'])}", "password": BENCH_PASSWORD})
+
+
+def scenario_profiles(client, ctx, rng):
+    user_id = rng.randint(1, ctx["users"])
+    return client.get(f"/profile/user-{user_id}", headers={"Authorization": f"Bearer {ctx['tokens'][user_id]}"})
+
+
+SCENARIOS = {
+    "reads": scenario_reads,
+    "comments": scenario_comments,
+    "logins": scenario_logins,
+    "profiles": scenario_profiles,
+}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight)
+    return weights
+
+
+def run_workload(ctx, weights, total_requests, concurrency, seed_value=0):
+    names, cumulative = list(weights), []
+    running = 0.0
+    for name in names:
+        running += weights[name]
+        cumulative.append(running)
+
+    samples = {name: [] for name in names}
+    lock = threading.Lock()
+    # The first total_requests % concurrency workers send one extra request.
+    per_thread, extra = divmod(total_requests, concurrency)
+
+    def worker(index):
+        rng = random.Random(seed_value + index)
+        client = app.test_client()
+        local = []
+        for _ in range(per_thread + (index < extra)):
+            pick = rng.random() * running
+            name = next(n for n, bound in zip(names, cumulative) if pick < bound)
+            _local.statements = 0
+            start = time.perf_counter()
+            response = SCENARIOS[name](client, ctx, rng)
+            local.append((name, time.perf_counter() - start, response.status_code, _local.statements))
+        with lock:
+            for name, latency, status, statements in local:
+                samples[name].append((latency, status, statements))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(min(concurrency, total_requests))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    if not samples:
+        return {"requests": 0}
+    latencies = [latency for latency, _, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(status >= 400 for _, status, _ in samples),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "sql_per_request": round(sum(statements for _, _, statements in samples) / len(samples), 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline_path}):")
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before or not result.get("requests") or not before.get("requests"):
+            continue
+        changes = []
+        for key in ("throughput_rps", "p95_ms", "p99_ms", "sql_per_request"):
+            old, new = before[key], result[key]
+            delta = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            changes.append(f"{key} {old} -> {new} ({delta})")
+        print(f"  {name:>9}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--comments-per-book", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file from an earlier run")
+    args = parser.parse_args()
+    if args.requests < 1 or args.concurrency < 1:
+        parser.error("--requests and --concurrency must be at least 1")
+
+    weights = parse_mix(args.mix)
+    with app.app_context():
+        seed(args.users, args.books, args.comments_per_book)
+        tokens = {
+            user_id: create_access_token(identity=str(user_id), additional_claims={"username": f"user-{user_id}", "ver": 0})
+            for user_id in range(1, args.users + 1)
+        }
+        dialect = db.engine.dialect.name
+    ctx = {"users": args.users, "books": args.books, "tokens": tokens}
+
+    samples, elapsed = run_workload(ctx, weights, args.requests, args.concurrency)
+    everything = [sample for scenario in samples.values() for sample in scenario]
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": dialect,
+            "params": vars(args),
+        },
+        "overall": summarize(everything, elapsed),
+        "scenarios": {name: summarize(scenario, elapsed) for name, scenario in samples.items()},
+    }
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
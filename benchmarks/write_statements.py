@@ -0,0 +1,69 @@
+"""Count the SQL statements each ownership-checked write issues.
+
+Usage: python -m benchmarks.write_statements
+
+PUT/DELETE on /books/<id> and /comment/<id> should be one conditional
+UPDATE/DELETE (plus the comment counter updates or the comments of the updated
+book), with a second read only when the write is refused. Also checks the
+If-Match outcomes. Exits non-zero if a write goes over its budget or an answer
+is wrong; tests/test_write_statements.py runs the same CASES.
+"""
+import sys
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from benchmarks import harness
+from database import db
+from security.tokens import current_token_version, token_claims
+from models import AuthModel
+
+# (label, method, path, json, headers builder, expected status, statement budget)
+CASES = [
+    ("PUT book", "PUT", "/books/1", {"name": "renamed-1"}, None, 201, 2),
+    ("PUT book, If-Match current", "PUT", "/books/1", {"name": "renamed-1b"}, "current", 201, 2),
+    ("PUT book, If-Match stale", "PUT", "/books/1", {"name": "renamed-1c"}, "stale", 412, 2),
+    ("PUT book, not owner", "PUT", "/books/2", {"name": "renamed-2"}, None, 403, 2),
+    ("PUT book, missing", "PUT", "/books/999999", {"name": "renamed-x"}, None, 404, 2),
+    ("PUT comment", "PUT", "/comment/1", {"comment": "edited", "book_id": 1}, None, 201, 1),
+    ("PUT comment, If-Match stale", "PUT", "/comment/1", {"comment": "edited", "book_id": 1}, "stale", 412, 2),
+    ("DELETE comment", "DELETE", "/comment/1", None, "current", 200, 3),
+    ("DELETE book", "DELETE", "/books/1", None, None, 200, 1),
+]
+
+
+def main():
+    app = harness.app
+    with app.app_context():
+        # Book 1 and comment 1 belong to user 2 in the seeded catalog.
+        harness.seed(10, 50, 2)
+        user = db.session.get(AuthModel, 2)
+        token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
+        # Warm the token version cache so only the writes themselves are counted.
+        current_token_version(user.id)
+    auth = {"Authorization": f"Bearer {token}"}
+    client = app.test_client()
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    failures = 0
+    for label, method, path, body, if_match, expected, budget in CASES:
+        headers = dict(auth)
+        if if_match:
+            etag = client.get(path).headers["ETag"]
+            headers["If-Match"] = etag if if_match == "current" else '"0-stale"'
+        statements.clear()
+        response = client.open(path, method=method, json=body, headers=headers)
+        ok = response.status_code == expected and len(statements) <= budget
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] {label}: {response.status_code} (want {expected}), "
+              f"{len(statements)} statement(s) (budget {budget})")
+        for statement in statements:
+            print("    " + " ".join(statement.split())[:120])
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
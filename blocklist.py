@@ -1 +1,124 @@
-BLOCKLIST = set()
\ No newline at end of file
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from database import db
+from models.revoked_tokens import RevokedTokenModel
+
+NEGATIVE_CACHE_TTL = 5
+NEGATIVE_CACHE_SIZE = 10000
+
+
+class MemoryRevocationStore:
+    """Process-local store; only correct with a single worker."""
+
+    sweep_interval = 60
+
+    def __init__(self):
+        self._tokens = {}
+        self._lock = Lock()
+        self._last_sweep = time.time()
+
+    def revoke(self, jti, expires_at):
+        with self._lock:
+            self._tokens[jti] = expires_at
+            self._sweep()
+
+    def is_revoked(self, jti):
+        expires_at = self._tokens.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            with self._lock:
+                self._tokens.pop(jti, None)
+            return False
+        return True
+
+    def _sweep(self):
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+        self._last_sweep = now
+
+
+class DatabaseRevocationStore:
+    """Shared store backed by the revoked_tokens table."""
+
+    def revoke(self, jti, expires_at):
+        now = int(time.time())
+        db.session.merge(RevokedTokenModel(jti=jti, expires_at=expires_at))
+        RevokedTokenModel.query.filter(RevokedTokenModel.expires_at <= now).delete()
+        db.session.commit()
+
+    def is_revoked(self, jti):
+        token = db.session.get(RevokedTokenModel, jti)
+        return token is not None and token.expires_at > time.time()
+
+
+class RedisRevocationStore:
+    """Shared store keeping one key per revoked jti, expired by Redis itself."""
+
+    prefix = "revoked:"
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("REVOCATION_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+
+    def revoke(self, jti, expires_at):
+        ttl = int(expires_at - time.time())
+        if ttl > 0:
+            self.client.set(self.prefix + jti, 1, ex=ttl)
+
+    def is_revoked(self, jti):
+        return bool(self.client.exists(self.prefix + jti))
+
+
+class Blocklist:
+    """Revocation facade with a short-lived per-worker cache of tokens known to be valid."""
+
+    def __init__(self):
+        self.store = MemoryRevocationStore()
+        self.negative_ttl = NEGATIVE_CACHE_TTL
+        self._negative = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app):
+        backend = app.config.get("REVOCATION_BACKEND", "memory")
+        if backend == "memory":
+            self.store = MemoryRevocationStore()
+        elif backend == "database":
+            self.store = DatabaseRevocationStore()
+        elif backend == "redis":
+            self.store = RedisRevocationStore(app.config["REVOCATION_REDIS_URL"])
+        else:
+            raise ValueError(f"Unknown REVOCATION_BACKEND: {backend}")
+        self.negative_ttl = app.config.get("REVOCATION_NEGATIVE_CACHE_TTL", NEGATIVE_CACHE_TTL)
+
+    def revoke(self, jti, expires_at):
+        self.store.revoke(jti, expires_at)
+        with self._lock:
+            self._negative.pop(jti, None)
+
+    def is_revoked(self, jti):
+        now = time.monotonic()
+        with self._lock:
+            checked_at = self._negative.get(jti)
+            if checked_at is not None and now - checked_at < self.negative_ttl:
+                return False
+
+        if self.store.is_revoked(jti):
+            return True
+
+        with self._lock:
+            self._negative[jti] = now
+            self._negative.move_to_end(jti)
+            while len(self._negative) > NEGATIVE_CACHE_SIZE:
+                self._negative.popitem(last=False)
+        return False
+
+
+BLOCKLIST = Blocklist()
@@ -0,0 +1,66 @@
+import json
+from itertools import islice
+
+from flask import request
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import db
+
+BULK_CHUNK_SIZE = 500
+
+
+def iter_bulk_items():
+    """Yield (index, item, error) from a JSON array body or an NDJSON stream."""
+    if request.mimetype == "application/x-ndjson":
+        index = 0
+        for line in request.stream:
+            if not line.strip():
+                continue
+            try:
+                yield index, json.loads(line), None
+            except ValueError:
+                yield index, None, "Invalid JSON"
+            index += 1
+        return
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array or an application/x-ndjson body")
+    for index, item in enumerate(items):
+        yield index, item, None
+
+
+def chunked(iterable, size=BULK_CHUNK_SIZE):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def insert_ignoring_conflicts(model, conflict_columns):
+    """INSERT ... ON CONFLICT DO NOTHING for the dialects that support it."""
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=conflict_columns)
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=conflict_columns)
+    return insert(model)
+
+
+def insert_adding_on_conflict(model, conflict_columns, column):
+    """INSERT ... ON CONFLICT DO UPDATE that adds the new value of column to the existing one."""
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(model)
+    elif dialect == "sqlite":
+        statement = sqlite.insert(model)
+    else:
+        raise NotImplementedError(f"No upsert for the {dialect} dialect")
+    return statement.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={column: getattr(model, column) + statement.excluded[column]},
+    )
+
+
+def item_result(index, status, **extra):
+    return {"index": index, "status": status, **extra}
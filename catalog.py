@@ -0,0 +1,222 @@
+"""Bulk export and import of users, books and comments (`flask catalog ...`).
+
+On PostgreSQL each table is streamed with COPY ... TO STDOUT / FROM STDIN in
+CSV or binary format, so memory stays flat whatever the table size. Other
+databases fall back to a streamed SELECT and batched INSERTs with the same CSV
+layout, which is what lets the commands run against SQLite locally.
+
+Tables are processed in foreign-key order, each in its own transaction. A
+resume point (`table:id`) skips the tables before `table` and the rows of
+`table` up to `id`, so an interrupted run can be picked up where it stopped.
+CSV exports write the file in id-ordered batches and record the last id and
+byte offset of every complete batch in `<file>.checkpoint`; a resumed export
+truncates the file to that offset rather than guessing where the last row
+ends, which a quoted value with newlines in it would defeat.
+"""
+import csv
+import os
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, func, insert, select, text
+
+from database import db
+from models.auth import AuthModel
+from models.books import BooksModel
+from models.comments import CommentsModel
+
+TABLES = {model.__tablename__: model.__table__ for model in (AuthModel, BooksModel, CommentsModel)}
+FORMATS = {"csv": "csv", "binary": "copy"}  # format -> file extension
+COPY_BUFFER = 64 * 1024
+BATCH_SIZE = 5000
+
+
+def is_postgres():
+    return db.engine.dialect.name == "postgresql"
+
+
+def table_path(directory, table, fmt):
+    return os.path.join(directory, f"{table}.{FORMATS[fmt]}")
+
+
+def open_table_file(path, mode):
+    """COPY streams bytes; the fallback reads and writes CSV text."""
+    if is_postgres():
+        return open(path, mode + "b")
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def tables_from(names, resume):
+    """The (table, after_id) pairs to process, honouring a resume point."""
+    resume_table, after_id = resume if resume else (None, 0)
+    started = resume_table is None
+    for name in TABLES:
+        if name not in names:
+            continue
+        if not started and name != resume_table:
+            continue
+        started = True
+        yield TABLES[name], after_id if name == resume_table else 0
+
+
+def checkpoint_path(path):
+    return path + ".checkpoint"
+
+
+def save_checkpoint(path, last_id, offset):
+    """Record that path holds every row up to last_id in its first offset bytes."""
+    temporary = checkpoint_path(path) + ".tmp"
+    with open(temporary, "w") as file:
+        file.write(f"{last_id} {offset}\n")
+    os.replace(temporary, checkpoint_path(path))
+
+
+def load_checkpoint(path):
+    """The (last_id, offset) of the last complete batch written to path, or None."""
+    try:
+        with open(checkpoint_path(path)) as file:
+            last_id, offset = file.read().split()
+    except (FileNotFoundError, ValueError):
+        return None
+    return int(last_id), int(offset)
+
+
+def rewind_to_checkpoint(path):
+    """Truncate an interrupted export to its last complete batch. Returns the batch's last id, or None."""
+    checkpoint = load_checkpoint(path)
+    if checkpoint is None or not os.path.exists(path):
+        return None
+    last_id, offset = checkpoint
+    with open(path, "rb+") as file:
+        file.truncate(offset)
+    return last_id
+
+
+def _copy(cursor, sql, file, to_file):
+    if hasattr(cursor, "copy_expert"):  # psycopg2
+        cursor.copy_expert(sql, file, size=COPY_BUFFER)
+        return
+    with cursor.copy(sql) as copy:  # psycopg 3
+        if to_file:
+            for data in copy:
+                file.write(data)
+        else:
+            while data := file.read(COPY_BUFFER):
+                copy.write(data)
+
+
+def _copy_options(fmt, header):
+    if fmt == "binary":
+        return "(FORMAT binary)"
+    return f"(FORMAT csv, HEADER {'true' if header else 'false'})"
+
+
+def _compile(query):
+    return str(query.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def export_table(table, file, fmt, where=None, after_id=0, header=True, progress=None):
+    """Write the table's rows (optionally filtered, and after a resume id) to file, in id order.
+
+    Returns the number of rows written. Runs in the session's transaction.
+    CSV is written in batches of BATCH_SIZE rows; after each one the file is
+    flushed and progress(last_id) is called, so the caller can checkpoint it.
+    Binary COPY output is a single stream with its own header and trailer.
+    """
+    columns = [column.name for column in table.columns]
+    query = select(*table.columns).order_by(table.c.id)
+    if where:
+        query = query.where(text(where))
+
+    if is_postgres() and fmt == "binary":
+        cursor = db.session.connection().connection.cursor()
+        _copy(cursor, f"COPY ({_compile(query)}) TO STDOUT WITH {_copy_options(fmt, header)}", file, to_file=True)
+        return cursor.rowcount
+
+    if header:
+        line = ",".join(columns) + "\n"
+        file.write(line.encode() if is_postgres() else line)
+    _checkpoint(file, progress, after_id)
+
+    count, last_id = 0, after_id
+    if is_postgres():
+        cursor = db.session.connection().connection.cursor()
+        while True:
+            batch = query.where(table.c.id > last_id).limit(BATCH_SIZE).subquery()
+            upper = db.session.execute(select(func.max(batch.c.id))).scalar()
+            if upper is None:
+                return count
+            sql = _compile(query.where(table.c.id > last_id, table.c.id <= upper))
+            _copy(cursor, f"COPY ({sql}) TO STDOUT WITH {_copy_options(fmt, False)}", file, to_file=True)
+            count += cursor.rowcount
+            last_id = upper
+            _checkpoint(file, progress, last_id)
+
+    writer = csv.writer(file, lineterminator="\n")
+    for row in db.session.execute(query.where(table.c.id > after_id).execution_options(yield_per=BATCH_SIZE)):
+        writer.writerow(row)
+        count += 1
+        last_id = row.id
+        if count % BATCH_SIZE == 0:
+            _checkpoint(file, progress, last_id)
+    if count % BATCH_SIZE:
+        _checkpoint(file, progress, last_id)
+    return count
+
+
+def _checkpoint(file, progress, last_id):
+    if progress:
+        file.flush()
+        progress(last_id)
+
+
+def _parse(column, value):
+    if value == "" and column.nullable:
+        return None
+    if isinstance(column.type, Integer):
+        return int(value)
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def import_table(table, file, fmt, after_id=0, progress=None):
+    """Load rows from file into table, skipping ids up to after_id. Returns the number of rows loaded.
+
+    COPY loads the whole table in one transaction; the fallback commits every
+    BATCH_SIZE rows and reports the last id of each batch through progress(id).
+    """
+    columns = [column.name for column in table.columns]
+
+    if is_postgres():
+        skip = f" WHERE id > {int(after_id)}" if after_id else ""
+        cursor = db.session.connection().connection.cursor()
+        _copy(cursor, f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH {_copy_options(fmt, True)}{skip}",
+              file, to_file=False)
+        count = cursor.rowcount
+        # Rows keep their ids, so move the sequence past them.
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT max(id) FROM {table.name}))"
+        ))
+        db.session.commit()
+        return count
+
+    count, batch = 0, []
+    for record in csv.DictReader(file):
+        row = {column.name: _parse(column, record[column.name]) for column in table.columns}
+        if row["id"] <= after_id:
+            continue
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            count += _insert_batch(table, batch, progress)
+            batch = []
+    if batch:
+        count += _insert_batch(table, batch, progress)
+    return count
+
+
+def _insert_batch(table, rows, progress):
+    db.session.execute(insert(table), rows)
+    db.session.commit()
+    if progress:
+        progress(rows[-1]["id"])
+    return len(rows)
@@ -0,0 +1,182 @@
+import os
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from catalog import (
+    FORMATS, TABLES, export_table, import_table, is_postgres, open_table_file, rewind_to_checkpoint, save_checkpoint,
+    table_path, tables_from,
+)
+from database import db
+from models.book_comment_days import BookCommentDayModel
+from models.books import BooksModel
+from models.comments import CommentsModel
+
+books_cli = AppGroup("books", help="Maintenance commands for the books table.")
+
+
+@books_cli.command("reconcile-counts")
+@click.option("--batch-size", default=1000, show_default=True, help="Books fixed per transaction.")
+def reconcile_counts(batch_size):
+    """Recompute comment_count and last_commented_at where they have drifted, and the per-day counts."""
+    actual_count = (
+        select(func.count(CommentsModel.id)).where(CommentsModel.book_id == BooksModel.id).scalar_subquery()
+    )
+    actual_last = (
+        select(func.max(CommentsModel.created_at)).where(CommentsModel.book_id == BooksModel.id).scalar_subquery()
+    )
+
+    fixed, last_id = 0, 0
+    max_id = db.session.query(func.max(BooksModel.id)).scalar() or 0
+    while last_id < max_id:
+        upper = last_id + batch_size
+        result = db.session.execute(
+            update(BooksModel)
+            .where(BooksModel.id > last_id, BooksModel.id <= upper)
+            .where((BooksModel.comment_count != actual_count) | BooksModel.last_commented_at.is_distinct_from(actual_last))
+            .values(comment_count=actual_count, last_commented_at=actual_last)
+            .execution_options(synchronize_session=False)
+        )
+        day = func.date(CommentsModel.created_at)
+        db.session.execute(
+            delete(BookCommentDayModel).where(BookCommentDayModel.book_id > last_id, BookCommentDayModel.book_id <= upper)
+        )
+        db.session.execute(insert(BookCommentDayModel).from_select(
+            ["book_id", "day", "comments"],
+            select(CommentsModel.book_id, day, func.count())
+            .where(CommentsModel.book_id > last_id, CommentsModel.book_id <= upper)
+            .group_by(CommentsModel.book_id, day),
+        ))
+        db.session.commit()
+        fixed += result.rowcount
+        last_id = upper
+
+    click.echo(f"Reconciled comment counters on {fixed} book(s) and rebuilt their per-day counts.")
+
+
+jobs_cli = AppGroup("jobs", help="Run and inspect background jobs.")
+
+
+@jobs_cli.command("work")
+@click.option("--once", is_flag=True, help="Run the jobs that are due, then exit.")
+def work(once):
+    """Run queued jobs in this process (for JOB_RUNNER=external)."""
+    from jobs import JOBS
+
+    ran = JOBS.work(once=once)
+    click.echo(f"Ran {ran} job(s).")
+
+
+@jobs_cli.command("list")
+@click.option("--all", "show_all", is_flag=True, help="Include finished jobs.")
+def list_jobs(show_all):
+    """Show queued, running and failed jobs with their progress."""
+    from models.jobs import JobModel
+
+    query = select(JobModel).order_by(JobModel.id)
+    if not show_all:
+        query = query.where(JobModel.status != "done")
+    for job in db.session.execute(query).scalars():
+        line = f"{job.id}\t{job.kind}\t{job.status}\tattempts={job.attempts}\t{job.payload}\t{job.progress}"
+        if job.last_error:
+            line += f"\t{job.last_error}"
+        click.echo(line)
+
+
+catalog_cli = AppGroup("catalog", help="Export and import users, books and comments in bulk.")
+
+
+def parse_resume(value):
+    if value is None:
+        return None
+    table, _, after_id = value.partition(":")
+    if table not in TABLES or not (after_id.isdigit() or not after_id):
+        raise click.BadParameter("use TABLE or TABLE:ID, e.g. books:120000", param_hint="--resume")
+    return table, int(after_id or 0)
+
+
+def parse_filters(values):
+    filters = {}
+    for value in values:
+        table, _, condition = value.partition(":")
+        if table not in TABLES or not condition:
+            raise click.BadParameter("use TABLE:CONDITION, e.g. \"comments:created_at >= '2026-01-01'\"",
+                                     param_hint="--where")
+        filters[table] = condition
+    return filters
+
+
+def catalog_options(func):
+    func = click.option("--resume", help="Start at TABLE[:ID]: skip earlier tables and rows up to ID. "
+                                         "Exports take ID from the table's checkpoint file.")(func)
+    func = click.option("--format", "fmt", type=click.Choice(list(FORMATS)), default="csv", show_default=True,
+                        help="binary is PostgreSQL's COPY format and needs PostgreSQL.")(func)
+    func = click.option("--table", "tables", multiple=True, type=click.Choice(list(TABLES)),
+                        help="Tables to process (default: all).")(func)
+    func = click.option("--dir", "directory", default="catalog-export", show_default=True,
+                        help="Directory holding one <table>.csv or <table>.copy file per table.")(func)
+    return func
+
+
+def check_format(fmt):
+    if fmt == "binary" and not is_postgres():
+        raise click.UsageError("--format binary needs a PostgreSQL database.")
+
+
+@catalog_cli.command("export")
+@catalog_options
+@click.option("--where", "filters", multiple=True, help="Row filter TABLE:CONDITION (SQL), repeatable.")
+def export_catalog(directory, tables, fmt, resume, filters):
+    """Stream tables to files with COPY TO STDOUT (or a streamed SELECT elsewhere)."""
+    check_format(fmt)
+    if resume and fmt == "binary":
+        raise click.UsageError("--resume appends to the interrupted file, which only works with --format csv.")
+    resume, filters = parse_resume(resume), parse_filters(filters)
+    os.makedirs(directory, exist_ok=True)
+    if is_postgres():
+        # One snapshot for every table, so the files are consistent with each other.
+        db.session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    for table, _ in tables_from(tables or TABLES, resume):
+        # A resumed table is cut back to its last checkpointed batch and appended to.
+        path = table_path(directory, table.name, fmt)
+        resuming = resume is not None and table.name == resume[0]
+        after_id = rewind_to_checkpoint(path) if resuming else None
+        if resuming:
+            if after_id is None:
+                raise click.UsageError(f"{path} has no checkpoint to resume from; export {table.name} without --resume.")
+            click.echo(f"{table.name}: resuming after id {after_id}")
+
+        with open_table_file(path, "w" if after_id is None else "a") as file:
+            def progress(last_id, file=file, path=path):
+                save_checkpoint(path, last_id, os.fstat(file.fileno()).st_size)
+
+            count = export_table(table, file, fmt, filters.get(table.name), after_id or 0,
+                                 header=after_id is None, progress=progress if fmt == "csv" else None)
+        click.echo(f"{table.name}: exported {count} row(s)")
+    db.session.rollback()
+
+
+@catalog_cli.command("import")
+@catalog_options
+def import_catalog(directory, tables, fmt, resume):
+    """Load exported files with COPY FROM STDIN (or batched inserts elsewhere), keeping ids."""
+    check_format(fmt)
+    resume = parse_resume(resume)
+
+    for table, after_id in tables_from(tables or TABLES, resume):
+        def progress(last_id, name=table.name):
+            click.echo(f"{name}: committed through id {last_id}")
+
+        with open_table_file(table_path(directory, table.name, fmt), "r") as file:
+            try:
+                count = import_table(table, file, fmt, after_id, progress)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                raise click.ClickException(
+                    f"{table.name}: {getattr(e, 'orig', e)}. Rows committed so far stay; "
+                    f"rerun with --resume {table.name}:<last committed id> once the cause is fixed."
+                )
+        click.echo(f"{table.name}: imported {count} row(s)")
@@ -0,0 +1,146 @@
+"""Response compression negotiated through Accept-Encoding.
+
+gzip is always available; br and zstd are offered when the optional `brotli`
+and `zstandard` packages are installed. Bodies below COMPRESS_MIN_SIZE are sent
+as they are, and streamed responses (NDJSON) are compressed chunk by chunk and
+flushed after each one, so clients still receive rows as they are produced.
+"""
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_ENCODINGS = "zstd,br,gzip"
+COMPRESSIBLE_MIMETYPES = frozenset({"application/json", "application/x-ndjson", "text/plain", "text/html"})
+
+
+class GzipCompressor:
+    def __init__(self, level=6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, quality=4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level=3):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+COMPRESSORS = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+
+def compress(data, encoding):
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding):
+    compressor = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        yield compressor.compress(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+class Compression:
+    def __init__(self):
+        self.encodings = []
+        self.min_size = DEFAULT_MIN_SIZE
+
+    def init_app(self, app):
+        wanted = app.config.get("COMPRESS_ENCODINGS", DEFAULT_ENCODINGS)
+        # Server preference order; unavailable encodings are skipped.
+        self.encodings = [name.strip() for name in wanted.split(",") if name.strip() in COMPRESSORS]
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+        if self.encodings:
+            app.after_request(self.compress_response)
+
+    def negotiate(self, accept_encodings=None):
+        """Best offered encoding for the request's (or the given) parsed Accept-Encoding."""
+        if accept_encodings is None:
+            accept_encodings = request.accept_encodings
+        best = accept_encodings.best_match(self.encodings)
+        if best is None or accept_encodings[best] <= 0:
+            return None
+        return best
+
+    def compress_response(self, response):
+        if (
+            request.method == "HEAD"
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or "no-transform" in response.headers.get("Cache-Control", "")
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        if not response.is_streamed and response.content_length is not None and response.content_length < self.min_size:
+            return response
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding)
+            response.direct_passthrough = False
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(compress(response.get_data(), encoding))
+        response.headers["Content-Encoding"] = encoding
+
+        # The compressed bytes differ from the identity representation.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+COMPRESSION = Compression()
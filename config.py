@@ -0,0 +1,122 @@
+import os
+from datetime import timedelta
+
+from database import engine_options_from_env
+from replicas import replica_binds
+
+
+class Config:
+    """Production settings; values come from the environment when the app is created."""
+
+    PROPAGATE_EXCEPTIONS = True
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    API_TITLE = "Books REST API"
+    API_VERSION = "v1"
+    OPENAPI_VERSION = "3.0.3"
+    OPENAPI_URL_PREFIX = "/"
+    OPENAPI_SWAGGER_UI_PATH = "/swagger-ui"
+    OPENAPI_SWAGGER_UI_URL = "https://cdn.jsdelivr.net/npm/swagger-ui-dist/"
+
+    JWT_BLACKLIST_ENABLED = True
+    JWT_BLACKLIST_TOKEN_CHECKS = ["access"]
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    # Wire Flask-Migrate (and import alembic) only for the `flask` CLI, not in serving workers.
+    MIGRATIONS = os.getenv("FLASK_RUN_FROM_CLI") == "true"
+
+    default_revocation_backend = "database"
+    default_book_cache_backend = "memory"
+    default_rate_limit_backend = "memory"
+    default_job_runner = "thread"
+    default_password_hash_workers = 2
+
+    def __init__(self):
+        self.JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+        self.COMPRESS_ENCODINGS = os.getenv("COMPRESS_ENCODINGS", "zstd,br,gzip")
+        self.COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+
+        self.SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+        self.SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env(self.SQLALCHEMY_DATABASE_URI)
+        self.JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+
+        replica_urls = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+        self.SQLALCHEMY_BINDS = replica_binds(replica_urls, engine_options_from_env)
+        self.REPLICA_RETRY_AFTER = float(os.getenv("REPLICA_RETRY_AFTER", 30))
+
+        self.REVOCATION_BACKEND = os.getenv("REVOCATION_BACKEND", self.default_revocation_backend)
+        self.REVOCATION_REDIS_URL = os.getenv("REVOCATION_REDIS_URL")
+        self.REVOCATION_NEGATIVE_CACHE_TTL = float(os.getenv("REVOCATION_NEGATIVE_CACHE_TTL", 5))
+        self.TOKEN_VERSION_TTL = float(os.getenv("TOKEN_VERSION_TTL", 30))
+
+        self.BOOK_CACHE_BACKEND = os.getenv("BOOK_CACHE_BACKEND", self.default_book_cache_backend)
+        self.BOOK_CACHE_REDIS_URL = os.getenv("BOOK_CACHE_REDIS_URL")
+        self.BOOK_CACHE_TTL = int(os.getenv("BOOK_CACHE_TTL", 60))
+        self.BOOK_CACHE_SIZE = int(os.getenv("BOOK_CACHE_SIZE", 1024))
+
+        # Unset rounds keeps passlib's pbkdf2-sha256 default.
+        self.PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", 0)) or None
+        self.PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", self.default_password_hash_workers))
+        self.PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 8))
+        self.PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 2))
+
+        self.RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", self.default_rate_limit_backend)
+        self.RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+
+        self.JOB_RUNNER = os.getenv("JOB_RUNNER", self.default_job_runner)
+        self.JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 5))
+        self.JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+        self.JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+        self.ACCOUNT_DELETION_BATCH_SIZE = int(os.getenv("ACCOUNT_DELETION_BATCH_SIZE", 500))
+
+        self.LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+        self.LOG_QUEUE_FULL_POLICY = os.getenv("LOG_QUEUE_FULL_POLICY", "drop")  # "drop" or "block"
+        self.LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", 200))
+        self.LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 1.0))
+        self.LOG_ROTATE_BYTES = int(os.getenv("LOG_ROTATE_BYTES", 0))
+        self.LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN")
+        self.LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+
+        self.METRICS_DIR = os.getenv("METRICS_DIR")
+        self.METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+        self.SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+
+        self.FAST_SERIALIZER_ENDPOINTS = frozenset(filter(None, os.getenv("FAST_SERIALIZER_ENDPOINTS", "").split(",")))
+
+
+class ProdConfig(Config):
+    pass
+
+
+class TestConfig(Config):
+    TESTING = True
+    MIGRATIONS = False
+
+    default_revocation_backend = "memory"
+    default_book_cache_backend = "none"
+    default_rate_limit_backend = "none"
+    # Tests run queued jobs themselves with JOBS.run_pending().
+    default_job_runner = "external"
+    # Hash inline: a spawned pool per test session only adds start-up time.
+    default_password_hash_workers = 0
+
+    def __init__(self):
+        super().__init__()
+        self.SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL", "sqlite://")
+        self.SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env(self.SQLALCHEMY_DATABASE_URI)
+        self.JWT_SECRET_KEY = self.JWT_SECRET_KEY or "test-secret-key-test-secret-key!"
+
+
+class BenchConfig(Config):
+    MIGRATIONS = False
+
+    default_revocation_backend = "memory"
+    default_rate_limit_backend = "none"
+
+    def __init__(self):
+        super().__init__()
+        self.JWT_SECRET_KEY = self.JWT_SECRET_KEY or "benchmark-secret-key-benchmark-secret"
+
+
+CONFIGS = {"prod": ProdConfig, "test": TestConfig, "bench": BenchConfig}
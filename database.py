@@ -1,3 +1,77 @@
+import os
+import time
+import weakref
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from metrics import Counter, Gauge, Histogram
+from replicas import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_OVERFLOW_CONNECTIONS = Counter("db_pool_overflow_connections_total", "Connections opened beyond pool_size")
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that gave up after pool_timeout")
+
+
+_POOLS = weakref.WeakSet()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time, overflow connections and timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _POOLS.add(self)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+        return connection
+
+    def _create_connection(self):
+        # QueuePool has already counted the new connection, so overflow() > 0
+        # means it is one of the max_overflow extras.
+        if self.overflow() > 0:
+            POOL_OVERFLOW_CONNECTIONS.inc()
+        return super()._create_connection()
+
+
+def _pool_stat(name):
+    def read():
+        pools = list(_POOLS)
+        return sum(getattr(pool, name)() for pool in pools) if pools else None
+    return read
+
+
+Gauge("db_pool_size", "Configured number of persistent connections", _pool_stat("size"))
+Gauge("db_pool_checked_out", "Connections currently in use", _pool_stat("checkedout"))
+Gauge("db_pool_overflow", "Connections open beyond pool_size (negative while below it)", _pool_stat("overflow"))
+
 
-db = SQLAlchemy()
\ No newline at end of file
+def engine_options_from_env(database_url):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from DB_POOL_* environment variables."""
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    }
+    # SQLite in-memory databases use SingletonThreadPool, which takes none of these.
+    if database_url and not database_url.startswith("sqlite"):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        )
+    return options
@@ -0,0 +1,33 @@
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+# Threaded workers, so a request waiting on the password-hash pool or the database
+# does not hold up the whole worker. Keep threads within DB_POOL_SIZE + DB_MAX_OVERFLOW.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# With preload the master imports main and builds the app once, and workers fork from it.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+wsgi_app = "main:app"
+
+
+def on_starting(server):
+    # A preloaded app is built in the master, which must not run the log writer thread
+    # (a fork could copy its locks held); each worker starts its own in post_fork.
+    if server.cfg.preload_app:
+        from logging_config import LOG_WRITER
+        LOG_WRITER.autostart = False
+
+
+def post_fork(server, worker):
+    # Pooled connections opened in the master must not be shared with the children;
+    # close=False leaves the parent's sockets alone while each worker starts a fresh pool.
+    from main import app
+    from database import db
+    from logging_config import LOG_WRITER
+
+    LOG_WRITER.start()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,89 @@
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import metrics
+from metrics import Counter, Histogram
+from logging_config import get_module_logger
+
+SLOW_REQUEST_MS = 500  # default until init_app() applies the config
+SLOW_REQUEST_MAX_STATEMENTS = 25
+
+logger = get_module_logger(__file__)
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by endpoint")
+REQUESTS = Counter("http_requests_total", "Requests by endpoint and status code")
+REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements issued per request",
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+SQL_STATEMENTS = Counter("http_sql_statements_total", "SQL statements issued by endpoint")
+SQL_SECONDS = Counter("http_sql_duration_seconds_total", "Time spent in SQL statements by endpoint")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts or not has_request_context():
+        return
+    duration = time.perf_counter() - starts.pop()
+    g.setdefault("sql_statements", []).append((statement, duration))
+
+
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+def _record_status(response):
+    g.response_status = response.status_code
+    return response
+
+
+def _finish(exc):
+    start = g.pop("request_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    endpoint = _endpoint()
+    status = g.pop("response_status", 500)
+    statements = g.pop("sql_statements", [])
+    sql_seconds = sum(duration for _, duration in statements)
+
+    REQUEST_LATENCY.observe(elapsed, endpoint=endpoint, method=request.method)
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=status)
+    REQUEST_SQL_STATEMENTS.observe(len(statements), endpoint=endpoint)
+    if statements:
+        SQL_STATEMENTS.inc(len(statements), endpoint=endpoint)
+        SQL_SECONDS.inc(sql_seconds, endpoint=endpoint)
+    metrics.maybe_flush()
+
+    if elapsed * 1000 >= SLOW_REQUEST_MS:
+        shown = "; ".join(
+            f"[{duration * 1000:.1f} ms] {' '.join(statement.split())}"
+            for statement, duration in statements[:SLOW_REQUEST_MAX_STATEMENTS]
+        )
+        logger.warning(
+            f"Slow request {request.method} {request.path} ({endpoint}) took {elapsed * 1000:.1f} ms, "
+            f"{len(statements)} SQL statements in {sql_seconds * 1000:.1f} ms: {shown}"
+        )
+
+
+def init_app(app):
+    global SLOW_REQUEST_MS
+    SLOW_REQUEST_MS = app.config.get("SLOW_REQUEST_MS", SLOW_REQUEST_MS)
+    metrics.init_app(app)
+    app.before_request(_start_timer)
+    app.after_request(_record_status)
+    app.teardown_request(_finish)
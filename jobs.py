@@ -0,0 +1,188 @@
+"""Background jobs queued in the `jobs` table.
+
+Jobs are added in the caller's transaction with JOBS.enqueue() and run by
+handlers registered with @JOBS.handler(kind). A handler does one bounded step
+per call and returns True once the job is finished; every step is committed
+together with the job's progress, so a retried job resumes where it stopped.
+
+With JOB_RUNNER=thread (default) each worker process runs a daemon thread that
+polls the table; with JOB_RUNNER=external jobs are only queued and
+`flask jobs work` runs them in a separate process. Claims are a conditional
+UPDATE with a lease, so any number of runners can share the table, and a job
+whose runner died is picked up again once its lease expires.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, select, update
+
+from database import db
+from logging_config import get_module_logger
+from metrics import Counter
+from models.jobs import JobModel
+
+DEFAULT_POLL_INTERVAL = 5
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_LEASE = 300
+RETRY_BACKOFF = 30
+CLAIM_CANDIDATES = 10
+
+logger = get_module_logger(__file__)
+
+JOBS_FINISHED = Counter("jobs_finished_total", "Background jobs by kind and final status")
+JOB_STEPS = Counter("job_steps_total", "Committed background job steps by kind")
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def runnable(now):
+    return or_(
+        and_(JobModel.status == "pending", JobModel.run_after <= now),
+        and_(JobModel.status == "running", JobModel.locked_until <= now),
+    )
+
+
+class JobRunner:
+    def __init__(self):
+        self.app = None
+        self.handlers = {}
+        self.mode = "thread"
+        self.poll_interval = DEFAULT_POLL_INTERVAL
+        self.max_attempts = DEFAULT_MAX_ATTEMPTS
+        self.lease = timedelta(seconds=DEFAULT_LEASE)
+        self._wake = threading.Event()
+        self._thread_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get("JOB_RUNNER", "thread")
+        if self.mode not in ("thread", "external"):
+            raise ValueError(f"Unknown JOB_RUNNER: {self.mode}")
+        self.poll_interval = app.config.get("JOB_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)
+        self.max_attempts = app.config.get("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+        self.lease = timedelta(seconds=app.config.get("JOB_LEASE_SECONDS", DEFAULT_LEASE))
+        if self.mode == "thread":
+            # Started lazily so gunicorn's preloading master never owns the thread.
+            app.before_request(self.ensure_started)
+
+    def handler(self, kind):
+        def decorator(func):
+            self.handlers[kind] = func
+            return func
+        return decorator
+
+    def enqueue(self, kind, **payload):
+        """Add a job to the current transaction; call wake() after committing it."""
+        job = JobModel(kind=kind, payload=payload, progress={}, run_after=utcnow())
+        db.session.add(job)
+        db.session.flush()
+        return job
+
+    def wake(self):
+        if self.mode == "thread":
+            self.ensure_started()
+            self._wake.set()
+
+    def ensure_started(self):
+        # A thread does not survive fork(), so each worker process starts its own.
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                self._thread_pid = os.getpid()
+                threading.Thread(target=self._loop, name="job-runner", daemon=True).start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    self.run_pending()
+            except Exception:
+                logger.exception("Job runner iteration failed")
+
+    def work(self, once=False):
+        """Run jobs in the foreground; used by `flask jobs work`."""
+        while True:
+            ran = self.run_pending()
+            if once:
+                return ran
+            if not ran:
+                time.sleep(self.poll_interval)
+
+    def run_pending(self, limit=None):
+        """Claim and run runnable jobs until none are left (or `limit` ran). Needs an app context."""
+        ran = 0
+        while limit is None or ran < limit:
+            job = self.claim()
+            if job is None:
+                break
+            self.run(job)
+            ran += 1
+        return ran
+
+    def claim(self):
+        now = utcnow()
+        candidates = db.session.execute(
+            select(JobModel.id).where(runnable(now)).order_by(JobModel.id).limit(CLAIM_CANDIDATES)
+        ).scalars().all()
+        for job_id in candidates:
+            claimed = db.session.execute(
+                update(JobModel)
+                .where(JobModel.id == job_id, runnable(now))
+                .values(status="running", locked_until=now + self.lease, attempts=JobModel.attempts + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(JobModel, job_id, populate_existing=True)
+        return None
+
+    def run(self, job):
+        handler = self.handlers.get(job.kind)
+        logger.info(f"Running job {job.id} ({job.kind}), attempt {job.attempts}")
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job.kind}'")
+            while not handler(job):
+                job.locked_until = utcnow() + self.lease
+                db.session.commit()
+                JOB_STEPS.inc(kind=job.kind)
+        except Exception as e:
+            db.session.rollback()
+            self.retry_or_fail(job, e)
+            return
+
+        job.status = "done"
+        job.locked_until = None
+        job.finished_at = utcnow()
+        db.session.commit()
+        JOB_STEPS.inc(kind=job.kind)
+        JOBS_FINISHED.inc(kind=job.kind, status="done")
+        logger.info(f"Job {job.id} ({job.kind}) finished: {job.progress}")
+
+    def retry_or_fail(self, job, error):
+        failed = job.attempts >= self.max_attempts
+        values = {"locked_until": None, "last_error": f"{type(error).__name__}: {error}"[:1000]}
+        if failed:
+            values.update(status="failed", finished_at=utcnow())
+        else:
+            values.update(status="pending", run_after=utcnow() + timedelta(seconds=RETRY_BACKOFF * 2 ** (job.attempts - 1)))
+        db.session.execute(
+            update(JobModel).where(JobModel.id == job.id).values(**values).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if failed:
+            JOBS_FINISHED.inc(kind=job.kind, status="failed")
+            logger.error(f"Job {job.id} ({job.kind}) failed after {job.attempts} attempts: {values['last_error']}")
+        else:
+            logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed, will retry: {values['last_error']}")
+
+
+JOBS = JobRunner()
@@ -1,38 +1,205 @@
+import atexit
 import logging
 import os
 import json
-from datetime import datetime
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import (
+    QueueHandler, RotatingFileHandler, TimedRotatingFileHandler, BaseRotatingHandler, WatchedFileHandler,
+)
+
+from metrics import Counter
 
 LOG_DIR = "Logs"
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Defaults until LOG_WRITER.init_app() applies the LOG_* config.
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 200
+LOG_FLUSH_INTERVAL = 1.0
+LOG_BACKUP_COUNT = 5
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
 class JsonFormatter(logging.Formatter):
     def format(self, record):
         log_record = {
-            "time": datetime.utcnow().isoformat(),
+            "time": datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None).isoformat(),
             "level": record.levelname,
             "module": record.name,
             "message": record.getMessage()
         }
         return json.dumps(log_record)
 
+
+class LogQueueHandler(QueueHandler):
+    """Hands records to the writer thread, dropping or blocking when the queue is full."""
+
+    def __init__(self, log_queue, block=False):
+        super().__init__(log_queue)
+        self.block = block
+
+    def enqueue(self, record):
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(logger=record.name)
+
+
+class LogWriter:
+    """Background thread that drains the log queue and writes records in batches.
+
+    A batch is flushed once it holds LOG_BATCH_SIZE records or its oldest record
+    is LOG_FLUSH_INTERVAL seconds old, whichever comes first. Records queue up
+    until the thread is started: by init_app(), or by gunicorn's post_fork hook
+    when the app is preloaded in the master.
+    """
+
+    _sentinel = object()
+
+    def __init__(self, log_queue, batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+        self.queue = log_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # In-process rotation is only safe with a single process writing Logs/; gunicorn
+        # workers share the files, so by default they are left to logrotate and reopened
+        # once they have been moved away.
+        self.rotate_bytes = 0
+        self.rotate_when = None  # e.g. "midnight"; size rotation when unset
+        self.backup_count = LOG_BACKUP_COUNT
+        self.autostart = True
+        self.queue_handler = LogQueueHandler(log_queue)
+        self.routes = {}
+        self._handlers = {}
+        self._handlers_lock = threading.Lock()
+        self._thread = None
+
+    def init_app(self, app):
+        self.queue.maxsize = app.config.get("LOG_QUEUE_SIZE", LOG_QUEUE_SIZE)
+        self.queue_handler.block = app.config.get("LOG_QUEUE_FULL_POLICY", "drop") == "block"
+        self.batch_size = app.config.get("LOG_BATCH_SIZE", LOG_BATCH_SIZE)
+        self.flush_interval = app.config.get("LOG_FLUSH_INTERVAL", LOG_FLUSH_INTERVAL)
+        self.rotate_bytes = app.config.get("LOG_ROTATE_BYTES", 0)
+        self.rotate_when = app.config.get("LOG_ROTATE_WHEN")
+        self.backup_count = app.config.get("LOG_BACKUP_COUNT", LOG_BACKUP_COUNT)
+        with self._handlers_lock:
+            # Rebuilt with the new rotation settings on their next write.
+            for handlers in self._handlers.values():
+                for handler in handlers:
+                    handler.close()
+            self._handlers = {}
+        if self.autostart:
+            self.start()
+
+    def register(self, logger_name, log_path):
+        self.routes[logger_name] = log_path
+
+    def handlers(self, logger_name):
+        with self._handlers_lock:
+            handlers = self._handlers.get(logger_name)
+            if handlers is None and logger_name in self.routes:
+                file_handler = self.make_file_handler(self.routes[logger_name])
+                file_handler.setFormatter(JsonFormatter())
+                console_handler = logging.StreamHandler()
+                console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+                handlers = self._handlers[logger_name] = [file_handler, console_handler]
+            return handlers or ()
+
+    def make_file_handler(self, log_path):
+        if self.rotate_when:
+            return TimedRotatingFileHandler(log_path, when=self.rotate_when, backupCount=self.backup_count, delay=True)
+        if self.rotate_bytes:
+            return RotatingFileHandler(log_path, maxBytes=self.rotate_bytes, backupCount=self.backup_count, delay=True)
+        return WatchedFileHandler(log_path, delay=True)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is self._sentinel:
+                self._flush(batch)
+                return
+            if record is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(record)
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+
+    def _flush(self, batch):
+        by_logger = {}
+        for record in batch:
+            by_logger.setdefault(record.name, []).append(record)
+        for name, records in by_logger.items():
+            for handler in self.handlers(name):
+                write_batch(handler, [r for r in records if r.levelno >= handler.level])
+
+
+def write_batch(handler, records):
+    if not records:
+        return
+    handler.acquire()
+    try:
+        if isinstance(handler, WatchedFileHandler):
+            handler.reopenIfNeeded()
+        elif isinstance(handler, BaseRotatingHandler) and handler.shouldRollover(records[0]):
+            handler.doRollover()
+        if handler.stream is None:
+            handler.stream = handler._open()
+        # One append per batch, so batches from different workers do not interleave.
+        handler.stream.write("".join(handler.format(r) + handler.terminator for r in records))
+        handler.flush()
+    except Exception:
+        handler.handleError(records[0])
+    finally:
+        handler.release()
+
+
+LOG_QUEUE = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+LOG_WRITER = LogWriter(LOG_QUEUE)
+atexit.register(LOG_WRITER.stop)
+
+
 def get_module_logger(module_file):
     module_name = os.path.splitext(os.path.basename(module_file))[0]
-    log_path = os.path.join(LOG_DIR, f"{module_name}.log")
+    # Absolute now: the file handler is only opened on the first write.
+    log_path = os.path.abspath(os.path.join(LOG_DIR, f"{module_name}.log"))
 
     logger = logging.getLogger(module_name)
     logger.setLevel(logging.INFO)
 
     if not logger.handlers:
-        file_handler = logging.FileHandler(log_path)
-        file_handler.setFormatter(JsonFormatter())
-
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-        logger.propagate = False  
+        LOG_WRITER.register(module_name, log_path)
+        logger.addHandler(LOG_WRITER.queue_handler)
+        logger.propagate = False
 
     return logger
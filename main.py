@@ -1,79 +1,146 @@
-from flask import Flask
-from flask_smorest import Api
+from dotenv import load_dotenv
 
-from database import db
-from models import BooksModel, CommentsModel, AuthModel
-from flask_migrate import Migrate
-
-from routers.books import blp as BookBlp
-from routers.comments import blp as CommentBlp
-from routers.auth import blp as AuthBlp
-from routers.user_profile import blp as UserProfile
-
-from flask_jwt_extended import JWTManager
-from blocklist import BLOCKLIST
-import os
-from dotenv import load_dotenv 
-
-from datetime import timedelta
-app = Flask(__name__)
+# Load .env before any module reads its settings from the environment.
 load_dotenv()
 
-app.config["PROPAGATE_EXCEPTIONS"] = True
-
-app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-app.config["API_TITLE"] = "Books REST API"
-app.config["API_VERSION"] = "v1"
-app.config["OPENAPI_VERSION"] = "3.0.3"
-app.config["OPENAPI_URL_PREFIX"] = "/"
-app.config["OPENAPI_SWAGGER_UI_PATH"] = "/swagger-ui"
-app.config["OPENAPI_SWAGGER_UI_URL"]  = "https://cdn.jsdelivr.net/npm/swagger-ui-dist/"
+import os
 
-app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
-app.config["JWT_BLACKLIST_ENABLED"] = True
-app.config["JWT_BLACKLIST_TOKEN_CHECKS"] = ["access"]
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=15)
-app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=30)
+from flask import Flask, Response, request
+from flask_jwt_extended import JWTManager, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 
+from config import CONFIGS
+from database import db
+from blocklist import BLOCKLIST
+from replicas import REPLICAS
+from response_cache import BOOK_CACHE
+from ratelimit import RATE_LIMITER
+from logging_config import LOG_WRITER, get_module_logger
 
-db.init_app(app)
-migrate = Migrate(app, db)
-api = Api(app)
-jwt = JWTManager(app)
+logger = get_module_logger(__file__)
+jwt = JWTManager()
+
+
+def create_app(config="prod"):
+    """Build the application. Nothing here opens a database connection."""
+    if isinstance(config, str):
+        config = CONFIGS[config]
+    if isinstance(config, type):
+        config = config()
+
+    app = Flask(__name__)
+    app.config.from_object(config)
+
+    from flask_smorest import Api
+    import instrumentation
+    import json_provider
+    from compression import COMPRESSION
+    import models  # noqa: F401  register every table on db.metadata
+    import account_deletion  # noqa: F401  register the delete_account job
+    from cli import books_cli, catalog_cli, jobs_cli
+    from jobs import JOBS
+    from metrics import render as render_metrics
+    import security.auth as password_hashing
+    from security.auth import HashingBusy
+    from security.tokens import TOKEN_VERSIONS
+
+    LOG_WRITER.init_app(app)
+    json_provider.init_app(app)
+    db.init_app(app)
+    REPLICAS.init_app(app)
+    instrumentation.init_app(app)
+    if app.config.get("MIGRATIONS"):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    api = Api(app)
+    jwt.init_app(app)
+    password_hashing.init_app(app)
+    BLOCKLIST.init_app(app)
+    TOKEN_VERSIONS.init_app(app)
+    BOOK_CACHE.init_app(app)
+    RATE_LIMITER.init_app(app)
+    COMPRESSION.init_app(app)
+    JOBS.init_app(app)
+    app.cli.add_command(books_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(catalog_cli)
+
+    from routers.books import blp as BookBlp
+    from routers.comments import blp as CommentBlp
+    from routers.auth import blp as AuthBlp
+    from routers.user_profile import blp as UserProfile
+    from routers.search import blp as SearchBlp
+
+    api.register_blueprint(BookBlp)
+    api.register_blueprint(CommentBlp)
+    api.register_blueprint(AuthBlp)
+    api.register_blueprint(UserProfile)
+    api.register_blueprint(SearchBlp)
+
+    @app.errorhandler(HashingBusy)
+    def handle_hashing_busy(error):
+        payload = {"code": 429, "status": "Too Many Requests", "message": "Server is busy, please retry."}
+        return payload, 429, {"Retry-After": str(error.retry_after)}
+
+    @app.route("/metrics")
+    def export_metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    app.before_request(log_all_requests)
+    return app
 
 
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
     jti = jwt_payload["jti"]
-    return jti in BLOCKLIST
+    return BLOCKLIST.is_revoked(jti)
 
 
-api.register_blueprint(BookBlp)
-api.register_blueprint(CommentBlp)
-api.register_blueprint(AuthBlp) 
-api.register_blueprint(UserProfile) 
+@jwt.user_lookup_loader
+def load_user_from_token(jwt_header, jwt_payload):
+    from security.tokens import load_request_user
+    return load_request_user(jwt_payload)
 
 
-from flask import request
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from models.auth import AuthModel  
-from logging_config import get_module_logger
+def request_claims():
+    """The claims of the request's bearer token, or None when there is no valid one.
+
+    Only the signature and expiry are checked: no blocklist or user lookup runs, so
+    logging adds no queries. Endpoints still authenticate the token themselves.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme != "Bearer" or not token:
+        return None
+    try:
+        return decode_token(token)
+    except (JWTExtendedException, PyJWTError):
+        return None
 
-logger = get_module_logger(__file__)
 
-@app.before_request
 def log_all_requests():
     ip = request.remote_addr
     ua = request.headers.get("User-Agent")
     method = request.method
     path = request.path
 
-    try:
-        verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = AuthModel.query.get(user_id)
-        logger.info(f"{method} {path} | IP: {ip} | User ID: {user_id} | Username: {user.username} | UA: {ua}")
-    except:
-        logger.info(f"{method} {path} | IP: {ip} | ANONYMOUS | UA: {ua}")
\ No newline at end of file
+    claims = request_claims()
+    if not claims:
+        logger.info(f"{method} {path} | IP: {ip} | ANONYMOUS | UA: {ua}")
+        return
+
+    logger.info(f"{method} {path} | IP: {ip} | User ID: {claims['sub']} | Username: {claims.get('username')} | UA: {ua}")
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `main:app` (gunicorn, FLASK_APP=main) builds the default app on first access,
+    # so importing create_app alone stays cheap.
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app(os.getenv("APP_CONFIG", "prod"))
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
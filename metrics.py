@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# With several gunicorn workers, point METRICS_DIR at a directory shared by all of
+# them (emptied on deploy); each worker snapshots its metrics there and /metrics
+# sums the snapshots, so every scrape sees the whole container. Set by init_app().
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5.0
+
+REGISTRY = []
+_last_flush = 0.0
+
+
+def _label_str(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, read):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        REGISTRY.append(self)
+
+    def samples(self):
+        value = self.read()
+        return [] if value is None else [(self.name, (), value)]
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append((f"{self.name}_bucket", key + (("le", le),), cumulative))
+            samples.append((f"{self.name}_count", key, cumulative))
+            samples.append((f"{self.name}_sum", key, total))
+        return samples
+
+
+def init_app(app):
+    global METRICS_DIR, METRICS_FLUSH_INTERVAL
+    METRICS_DIR = app.config.get("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = app.config.get("METRICS_FLUSH_INTERVAL", METRICS_FLUSH_INTERVAL)
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f"metrics-{pid}.json")
+
+
+def flush():
+    """Write this process's samples to METRICS_DIR for other workers to aggregate."""
+    global _last_flush
+    if not METRICS_DIR:
+        return
+    snapshot = {metric.name: [[name, list(labels), value] for name, labels, value in metric.samples()]
+                for metric in REGISTRY}
+    path = _snapshot_path(os.getpid())
+    with open(path + ".tmp", "w") as f:
+        json.dump(snapshot, f)
+    os.replace(path + ".tmp", path)
+    _last_flush = time.monotonic()
+
+
+def maybe_flush():
+    if METRICS_DIR and time.monotonic() - _last_flush >= METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _collect():
+    if not METRICS_DIR:
+        return {metric.name: metric.samples() for metric in REGISTRY}
+
+    flush()
+    totals = {metric.name: {} for metric in REGISTRY}
+    gauges = {metric.name for metric in REGISTRY if metric.type == "gauge"}
+    for filename in os.listdir(METRICS_DIR):
+        if not (filename.startswith("metrics-") and filename.endswith(".json")):
+            continue
+        pid = int(filename[len("metrics-"):-len(".json")])
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        alive = _pid_alive(pid)
+        for metric_name, samples in snapshot.items():
+            # Counters from exited workers still count; their gauges are stale.
+            if metric_name not in totals or (metric_name in gauges and not alive):
+                continue
+            for name, labels, value in samples:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                totals[metric_name][key] = totals[metric_name].get(key, 0) + value
+    return {metric_name: [(name, labels, value) for (name, labels), value in samples.items()]
+            for metric_name, samples in totals.items()}
+
+
+def render():
+    """Render every registered metric in the Prometheus text exposition format."""
+    collected = _collect()
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in collected.get(metric.name, ()):
+            lines.append(f"{name}{_label_str(labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,32 @@
+"""row versions on books and comments for If-Match preconditions
+
+Revision ID: 5e8c1a4f7b29
+Revises: 0b3d6f8a1c52
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8c1a4f7b29'
+down_revision = '0b3d6f8a1c52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,48 @@
+"""per-day comment counts per book for windowed rankings
+
+Revision ID: 9c2e5b7d1f38
+Revises: 5e8c1a4f7b29
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e5b7d1f38'
+down_revision = '5e8c1a4f7b29'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 10000
+
+
+def upgrade():
+    op.create_table('book_comment_days',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('comments', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], name='fk_book_comment_days_book_id', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id', 'day')
+    )
+
+    # Backfill in book id ranges, one short transaction per range.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT max(id) FROM books")).scalar() or 0
+        for start in range(0, max_id, BATCH_SIZE):
+            bind.execute(sa.text(
+                "INSERT INTO book_comment_days (book_id, day, comments) "
+                "SELECT book_id, date(created_at), count(*) FROM comments "
+                "WHERE book_id > :start AND book_id <= :end "
+                "GROUP BY book_id, date(created_at)"
+            ), {"start": start, "end": start + BATCH_SIZE})
+
+    op.create_index('ix_book_comment_days_day_comments', 'book_comment_days', ['day', 'comments'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_book_comment_days_day_comments', table_name='book_comment_days')
+    op.drop_table('book_comment_days')
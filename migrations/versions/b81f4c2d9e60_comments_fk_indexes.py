@@ -0,0 +1,32 @@
+"""index comments foreign keys
+
+Revision ID: b81f4c2d9e60
+Revises: a3c1e9f2b7d4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f4c2d9e60'
+down_revision = 'a3c1e9f2b7d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_comments_book_id'), 'comments', ['book_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_comments_user_id'), 'comments', ['user_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_comments_user_id'), table_name='comments',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_comments_book_id'), table_name='comments',
+                      postgresql_concurrently=True, if_exists=True)
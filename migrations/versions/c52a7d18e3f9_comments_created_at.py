@@ -0,0 +1,32 @@
+"""add comments.created_at
+
+Revision ID: c52a7d18e3f9
+Revises: b81f4c2d9e60
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52a7d18e3f9'
+down_revision = 'b81f4c2d9e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_comments_created_at'), 'comments', ['created_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_comments_created_at'), table_name='comments',
+                      postgresql_concurrently=True, if_exists=True)
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.drop_column('created_at')
@@ -0,0 +1,80 @@
+"""full-text search columns and indexes (Postgres only)
+
+Revision ID: d9e4b6a1c2f7
+Revises: c52a7d18e3f9
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e4b6a1c2f7'
+down_revision = 'c52a7d18e3f9'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 10000
+
+# Plain columns kept up to date by triggers instead of GENERATED ... STORED columns:
+# adding a stored generated column rewrites the whole table under an ACCESS EXCLUSIVE
+# lock, while a nullable column is a catalog-only change and is backfilled below.
+VECTORS = {
+    'books': ("to_tsvector('simple', coalesce({row}name, '') || ' ' || coalesce({row}author, ''))", 'name, author'),
+    'comments': ("to_tsvector('simple', coalesce({row}comment, ''))", 'comment'),
+}
+
+
+def backfill(table, expression):
+    """Fill search_vector in id ranges, one short transaction per range."""
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text(f"SELECT max(id) FROM {table}")).scalar() or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        bind.execute(
+            sa.text(f"UPDATE {table} SET search_vector = {expression} "
+                    "WHERE id > :start AND id <= :end AND search_vector IS NULL"),
+            {"start": start, "end": start + BATCH_SIZE},
+        )
+
+
+def upgrade():
+    # Other databases fall back to LIKE queries in routers/search.py.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, (expression, columns) in VECTORS.items():
+        op.execute(f"ALTER TABLE {table} ADD COLUMN search_vector tsvector")
+        op.execute(
+            f"CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$ "
+            f"BEGIN NEW.search_vector := {expression.format(row='NEW.')}; RETURN NEW; END "
+            "$$ LANGUAGE plpgsql"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {columns} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()"
+        )
+
+    # The triggers are committed first, so rows written during the backfill are covered.
+    with op.get_context().autocommit_block():
+        for table, (expression, _) in VECTORS.items():
+            backfill(table, expression.format(row=''))
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_search_vector ON books USING gin (search_vector)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_comments_search_vector ON comments USING gin (search_vector)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_name_trgm ON books USING gin (name gin_trgm_ops)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_author_trgm ON books USING gin (author gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for index in ('ix_books_author_trgm', 'ix_books_name_trgm', 'ix_comments_search_vector', 'ix_books_search_vector'):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+    for table in VECTORS:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector_update()")
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,55 @@
+"""denormalized comment counters on books
+
+Revision ID: e7f3a0c5d814
+Revises: d9e4b6a1c2f7
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f3a0c5d814'
+down_revision = 'd9e4b6a1c2f7'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 10000
+
+
+def upgrade():
+    # Constant defaults and nullable columns are catalog-only changes on PostgreSQL 11+.
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_commented_at', sa.DateTime(), nullable=True))
+
+    # Backfill in id ranges, one short transaction per range, instead of one UPDATE
+    # that would hold row locks on every book until it finished.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT max(id) FROM books")).scalar() or 0
+        for start in range(0, max_id, BATCH_SIZE):
+            bind.execute(sa.text(
+                "UPDATE books SET "
+                "comment_count = (SELECT count(*) FROM comments WHERE comments.book_id = books.id), "
+                "last_commented_at = (SELECT max(created_at) FROM comments WHERE comments.book_id = books.id) "
+                "WHERE books.id > :start AND books.id <= :end"
+            ), {"start": start, "end": start + BATCH_SIZE})
+
+        op.create_index('ix_books_comment_count_id', 'books', ['comment_count', 'id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_books_last_commented_at'), 'books', ['last_commented_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_books_last_commented_at'), table_name='books',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_books_comment_count_id', table_name='books',
+                      postgresql_concurrently=True, if_exists=True)
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.drop_column('last_commented_at')
+        batch_op.drop_column('comment_count')
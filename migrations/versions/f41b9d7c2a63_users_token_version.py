@@ -0,0 +1,26 @@
+"""token version on users for invalidating issued JWTs
+
+Revision ID: f41b9d7c2a63
+Revises: e7f3a0c5d814
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41b9d7c2a63'
+down_revision = 'e7f3a0c5d814'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
@@ -1,3 +1,6 @@
 from models.books import BooksModel
 from models.comments import CommentsModel
 from models.auth import AuthModel
+from models.revoked_tokens import RevokedTokenModel
+from models.jobs import JobModel
+from models.book_comment_days import BookCommentDayModel
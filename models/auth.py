@@ -7,3 +7,6 @@ class AuthModel(db.Model):
     username = db.Column(db.String(50), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=True)
     email = db.Column(db.String(100), unique=True, nullable=True)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Set when the account is scheduled for deletion; the row goes once its data is gone.
+    deleted_at = db.Column(db.DateTime, nullable=True)
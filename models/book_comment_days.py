@@ -0,0 +1,15 @@
+from database import db
+
+class BookCommentDayModel(db.Model):
+    """Comments made on a book per UTC day, kept in step with books.comment_count."""
+
+    __tablename__ = "book_comment_days"
+    __table_args__ = (db.Index("ix_book_comment_days_day_comments", "day", "comments"),)
+
+    book_id = db.Column(
+        db.Integer,
+        db.ForeignKey("books.id", ondelete="CASCADE", name="fk_book_comment_days_book_id"),
+        primary_key=True
+    )
+    day = db.Column(db.Date, primary_key=True)
+    comments = db.Column(db.Integer, nullable=False, default=0, server_default="0")
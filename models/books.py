@@ -2,15 +2,21 @@ from database import db
 
 class BooksModel(db.Model):
     __tablename__ = "books"
+    __table_args__ = (db.Index("ix_books_comment_count_id", "comment_count", "id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False, unique=True)
     author = db.Column(db.String(50), nullable=False)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_commented_at = db.Column(db.DateTime, nullable=True, index=True)
+    # Bumped by every edit; ETags carry it so If-Match can be checked in the UPDATE itself.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     comments = db.relationship(
         "CommentsModel",
         back_populates="book",
         lazy=True,
+        order_by="CommentsModel.id",
         cascade="all, delete-orphan",  
         passive_deletes=True          
     )
@@ -9,14 +9,19 @@ class CommentsModel(db.Model):
     book_id = db.Column(
         db.Integer,
         db.ForeignKey("books.id", ondelete="CASCADE", name="fk_comments_book_id"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     user_id = db.Column(
         db.Integer,
         db.ForeignKey("users.id", name="fk_comments_user_id"),
-        nullable=False 
+        nullable=False,
+        index=True
     )
 
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), index=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
     book = db.relationship("BooksModel", back_populates="comments", lazy=True)
     user = db.relationship("AuthModel", backref="comments", lazy=True)
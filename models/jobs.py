@@ -0,0 +1,21 @@
+from database import db
+
+class JobModel(db.Model):
+    __tablename__ = "jobs"
+    __table_args__ = (db.Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    progress = db.Column(db.JSON, nullable=False, default=dict)
+
+    # pending -> running -> done, or back to pending with a later run_after until
+    # JOB_MAX_ATTEMPTS is reached and the job is marked failed.
+    status = db.Column(db.String(20), nullable=False, default="pending", server_default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    run_after = db.Column(db.DateTime, nullable=False)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    finished_at = db.Column(db.DateTime, nullable=True)
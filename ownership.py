@@ -0,0 +1,42 @@
+from flask_jwt_extended import get_jwt_identity
+from flask_smorest import abort
+from sqlalchemy import select
+
+from database import db
+from logging_config import get_module_logger
+from response_cache import if_match_versions
+
+logger = get_module_logger(__file__)
+
+
+def row_id_or_404(value):
+    if not value.isdigit():
+        abort(404)
+    return int(value)
+
+
+def owned_write(statement, model, row_id, forbidden):
+    """Run an UPDATE/DELETE ... RETURNING on the caller's own row in one round trip.
+
+    The statement is restricted to `id = row_id AND user_id = <caller>` and, when
+    If-Match is sent, to the row versions its ETags name. Only when no row
+    matched is the row read again, to answer 404, 403 (with `forbidden`) or 412.
+    """
+    user_id = int(get_jwt_identity())
+    statement = statement.where(model.id == row_id, model.user_id == user_id)
+    versions = if_match_versions()
+    if versions is not None:
+        statement = statement.where(model.version.in_(versions))
+
+    row = db.session.execute(statement.execution_options(synchronize_session=False)).first()
+    if row is not None:
+        return row
+
+    owner_id = db.session.execute(select(model.user_id).where(model.id == row_id)).scalar_one_or_none()
+    if owner_id is None:
+        abort(404)
+    if owner_id != user_id:
+        logger.warning(f"User {user_id} unauthorized to modify {model.__tablename__} ID {row_id}")
+        abort(403, message=forbidden)
+    logger.info(f"If-Match failed for {model.__tablename__} ID {row_id} by user {user_id}")
+    abort(412, message="The resource has changed since it was fetched; reload it and retry.")
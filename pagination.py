@@ -0,0 +1,72 @@
+import base64
+import binascii
+import json
+from urllib.parse import urlencode
+
+from flask import request
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+STREAM_CHUNK_SIZE = 500
+
+
+def encode_cursor(last_id):
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the last seen id stored in an opaque cursor, or raise ValueError."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(payload["id"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_page(query, key_column, limit, cursor=None):
+    """Fetch one page ordered by key_column, returning (items, next_cursor)."""
+    if cursor:
+        query = query.filter(key_column > decode_cursor(cursor))
+    items = query.order_by(key_column).limit(limit + 1).all()
+    return split_page(items, limit, key_column.key)
+
+
+def split_page(items, limit, key):
+    """Trim a limit + 1 fetch to one page, returning (items, next_cursor)."""
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(getattr(items[-1], key))
+    return items, next_cursor
+
+
+def keyset_iter(query, key_column, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield chunks of the whole result set without holding more than one chunk in memory."""
+    cursor = None
+    while True:
+        items, cursor = keyset_page(query, key_column, chunk_size, cursor)
+        if items:
+            yield items
+        if cursor is None:
+            return
+
+
+def next_page_headers(next_cursor, limit):
+    return page_headers(request.base_url, request.args.to_dict(), next_cursor, limit)
+
+
+def page_headers(base_url, args, next_cursor, limit):
+    if next_cursor is None:
+        return {}
+    args = dict(args, cursor=next_cursor, limit=limit)
+    return {
+        "Link": f'<{base_url}?{urlencode(args)}>; rel="next"',
+        "X-Next-Cursor": next_cursor,
+    }
+
+
+def wants_ndjson():
+    best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
@@ -0,0 +1,192 @@
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+from logging_config import get_module_logger
+from metrics import Counter
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+MEMORY_BUCKETS = 100000
+
+logger = get_module_logger(__file__)
+
+RATE_LIMITED = Counter("http_rate_limited_total", "Requests rejected with 429 by the rate limiter")
+
+
+class RateLimit:
+    """A token bucket: `count` requests per `period`, with bursts of up to `burst`.
+
+    key="identity" gives each JWT identity its own bucket (anonymous callers share
+    one per IP); key="ip" always buckets by remote address.
+    """
+
+    def __init__(self, spec, burst=None, key="identity"):
+        count, _, period = spec.partition("/")
+        if key not in ("identity", "ip"):
+            raise ValueError(f"Unknown rate limit key: {key}")
+        self.spec = spec
+        self.rate = int(count) / PERIODS[period]
+        self.capacity = burst or int(count)
+        self.key = key
+
+
+class MemoryRateLimitStore:
+    """Per-process buckets; each gunicorn worker counts on its own."""
+
+    def __init__(self, maxsize=MEMORY_BUCKETS):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = Lock()
+
+    def hit(self, key, rate, capacity):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class RedisRateLimitStore:
+    """Buckets shared by every worker, updated atomically by a Lua script on Redis' clock."""
+
+    prefix = "bookverse:ratelimit:"
+    script = """
+        local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+        local tokens = tonumber(state[1]) or capacity
+        local updated = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+        local wait = 0
+        if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return tostring(wait)
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.errors = (redis.RedisError,)
+        self.client = redis.Redis.from_url(url)
+        self._hit = self.client.register_script(self.script)
+
+    def hit(self, key, rate, capacity):
+        try:
+            return float(self._hit(keys=[self.prefix + key], args=[rate, capacity]))
+        except self.errors as e:
+            # An unreachable Redis must not take the API down with it.
+            logger.warning(f"Rate limit store unavailable, letting the request through: {e}")
+            return 0.0
+
+
+def request_identity(authorization, remote_addr):
+    """Bucket key of the caller: the JWT subject when a valid Bearer token is sent, else the IP.
+
+    Only the token signature and expiry are checked, so nothing here touches the database.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{decode_token(token)['sub']}"
+        except (JWTExtendedException, PyJWTError):
+            pass
+    return f"ip:{remote_addr or 'unknown'}"
+
+
+class RateLimiter:
+    """Enforces the limits declared on views with RATE_LIMITER.limit(...).
+
+    Limits are checked in a before_request hook registered ahead of the request
+    logger and JWT loaders, so a rejected call costs one bucket update and no
+    database or hashing work.
+    """
+
+    def __init__(self):
+        self.store = None
+        self._limits = {}
+
+    def init_app(self, app):
+        backend = app.config.get("RATE_LIMIT_BACKEND", "memory")
+        if backend == "memory":
+            self.store = MemoryRateLimitStore()
+        elif backend == "redis":
+            self.store = RedisRateLimitStore(app.config["RATE_LIMIT_REDIS_URL"])
+        elif backend == "none":
+            self.store = None
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+        self._limits = {}
+        if self.store is not None:
+            app.before_request(self.check_request)
+
+    @staticmethod
+    def limit(spec, burst=None, key="identity"):
+        """Declare a limit on a view method, e.g. @RATE_LIMITER.limit("10/minute", key="ip")."""
+        rate_limit = RateLimit(spec, burst, key)
+
+        def decorator(func):
+            func.rate_limits = [rate_limit, *getattr(func, "rate_limits", ())]
+            return func
+        return decorator
+
+    def limits_for(self, app, endpoint, method):
+        cache_key = (endpoint, method)
+        if cache_key not in self._limits:
+            view = app.view_functions.get(endpoint)
+            view_class = getattr(view, "view_class", None)
+            func = getattr(view_class, method.lower(), None)
+            if func is None and method == "HEAD":
+                func = getattr(view_class, "get", None)
+            self._limits[cache_key] = tuple(getattr(func, "rate_limits", ()))
+        return self._limits[cache_key]
+
+    def retry_after(self, endpoint, method, limits, identity, remote_addr):
+        """Seconds the caller must wait, or None when the request may proceed."""
+        wait = 0.0
+        for rate_limit in limits:
+            who = identity if rate_limit.key == "identity" else f"ip:{remote_addr}"
+            wait = max(wait, self.store.hit(f"{endpoint}:{method}:{rate_limit.spec}:{who}",
+                                            rate_limit.rate, rate_limit.capacity))
+        if wait <= 0:
+            return None
+        RATE_LIMITED.inc(endpoint=endpoint)
+        logger.warning(f"Rate limit exceeded: {method} {endpoint} by {identity}")
+        return max(1, math.ceil(wait))
+
+    def check_request(self):
+        if request.endpoint is None:
+            return None
+        limits = self.limits_for(current_app, request.endpoint, request.method)
+        if not limits:
+            return None
+        identity = request_identity(request.headers.get("Authorization"), request.remote_addr)
+        retry_after = self.retry_after(request.endpoint, request.method, limits, identity, request.remote_addr)
+        if retry_after is None:
+            return None
+        return too_many_requests(), 429, {"Retry-After": str(retry_after)}
+
+
+def too_many_requests():
+    return {"code": 429, "status": "Too Many Requests", "message": "Rate limit exceeded, please retry later."}
+
+
+RATE_LIMITER = RateLimiter()
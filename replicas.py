@@ -0,0 +1,143 @@
+import itertools
+import time
+from threading import Lock
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+
+from logging_config import get_module_logger
+from metrics import Counter, Gauge
+
+REPLICA_BIND_PREFIX = "replica"
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+DEFAULT_RETRY_AFTER = 30
+
+logger = get_module_logger(__file__)
+
+REPLICA_REQUESTS = Counter("db_replica_requests_total", "Requests whose reads were routed to a replica")
+REPLICA_FAILURES = Counter("db_replica_failures_total", "Connection errors that took a replica out of rotation")
+
+
+def replica_binds(urls, engine_options):
+    """SQLALCHEMY_BINDS entries for DATABASE_REPLICA_URLS; engine_options(url) gives each engine's options."""
+    return {f"{REPLICA_BIND_PREFIX}{index}": {"url": url, **engine_options(url)} for index, url in enumerate(urls)}
+
+
+class ReplicaRouter:
+    """Picks a healthy replica per read-only request, round-robin.
+
+    Replicas that raise connection errors are skipped for REPLICA_RETRY_AFTER
+    seconds. When none are healthy, reads fall back to the primary.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.retry_after = DEFAULT_RETRY_AFTER
+        self._down_until = {}
+        self._cycle = itertools.cycle(())
+        self._lock = Lock()
+        Gauge("db_replicas_healthy", "Replicas currently in rotation", self.healthy_count)
+
+    def init_app(self, app):
+        binds = app.config.get("SQLALCHEMY_BINDS") or {}
+        self.names = sorted(name for name in binds if name.startswith(REPLICA_BIND_PREFIX))
+        self.retry_after = app.config.get("REPLICA_RETRY_AFTER", DEFAULT_RETRY_AFTER)
+        self._down_until = {}
+        self._cycle = itertools.cycle(self.names)
+        with app.app_context():
+            engines = app.extensions["sqlalchemy"].engines
+            for name in self.names:
+                self.watch(engines[name], name)
+
+    def watch(self, engine, name):
+        """Take replica `name` out of rotation when `engine` (a sync Engine) reports a connection error."""
+        event.listen(engine, "handle_error", self._error_listener(name))
+
+    def _error_listener(self, name):
+        def handle_error(context):
+            dbapi = context.engine.dialect.dbapi if context.engine is not None else None
+            operational = dbapi is not None and isinstance(context.original_exception, dbapi.OperationalError)
+            if context.is_disconnect or operational:
+                self.mark_down(name)
+        return handle_error
+
+    def mark_down(self, name):
+        with self._lock:
+            self._down_until[name] = time.monotonic() + self.retry_after
+        REPLICA_FAILURES.inc(replica=name)
+        logger.warning(f"Replica {name} taken out of rotation for {self.retry_after}s after a connection error")
+
+    def is_down(self, name):
+        return self._down_until.get(name, 0) > time.monotonic()
+
+    def healthy_count(self):
+        if not self.names:
+            return None
+        now = time.monotonic()
+        return sum(self._down_until.get(name, 0) <= now for name in self.names)
+
+    def _next_healthy(self):
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.names)):
+                name = next(self._cycle)
+                if self._down_until.get(name, 0) <= now:
+                    return name
+        return None
+
+    def pick(self):
+        """Bind name of the next healthy replica, or None for the primary. Counts the request."""
+        name = self._next_healthy() if self.names else None
+        if name is not None:
+            REPLICA_REQUESTS.inc(replica=name)
+        return name
+
+    def choose(self):
+        """Bind name of the replica serving this request, or None for the primary."""
+        if not self.names or not has_request_context() or request.method not in READ_METHODS:
+            return None
+        if "replica" not in g:
+            g.replica = self.pick()
+        return g.replica
+
+
+REPLICAS = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Session that sends reads of read-only requests to REPLICAS.
+
+    Anything written in the request pins the rest of it to the primary, so a
+    read after a write sees that write. A statement that fails because its
+    replica went down is retried once on the primary.
+    """
+
+    def execute(self, *args, **kwargs):
+        try:
+            return super().execute(*args, **kwargs)
+        except exc.DBAPIError:
+            replica = g.get("replica") if has_request_context() else None
+            if replica is None or not REPLICAS.is_down(replica):
+                raise
+            self.rollback()
+            g.replica = None
+            return super().execute(*args, **kwargs)
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get("wrote"):
+            name = REPLICAS.choose()
+            if name is not None:
+                return self._db.engines[name]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _pin_before_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from flask import Response, current_app, request
+
+DEFAULT_TTL = 60
+DEFAULT_SIZE = 1024
+
+
+class MemoryCacheBackend:
+    """Per-process LRU with TTL. Each gunicorn worker has its own copy, so a write
+    in one worker only reaches the others once their entries expire."""
+
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for key in self._counters:
+                self._counters[key] += 1
+
+
+class RedisCacheBackend:
+    """Cache shared by every worker; invalidations are visible immediately."""
+
+    prefix = "bookverse:cache:"
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("BOOK_CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(ttl))
+
+    def delete(self, *keys):
+        self.client.delete(*(self.prefix + key for key in keys))
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + "counter:" + key) or 0)
+
+    def incr(self, key):
+        self.client.incr(self.prefix + "counter:" + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            if b":counter:" in key:
+                self.client.incr(key)
+            else:
+                self.client.delete(key)
+
+
+class ResponseCache:
+    """Caches serialized JSON bodies and answers conditional requests from them."""
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = DEFAULT_TTL
+
+    def init_app(self, app):
+        backend = app.config.get("BOOK_CACHE_BACKEND", "memory")
+        if backend == "memory":
+            self.backend = MemoryCacheBackend(app.config.get("BOOK_CACHE_SIZE", DEFAULT_SIZE))
+        elif backend == "redis":
+            self.backend = RedisCacheBackend(app.config["BOOK_CACHE_REDIS_URL"])
+        elif backend == "none":
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown BOOK_CACHE_BACKEND: {backend}")
+        self.ttl = app.config.get("BOOK_CACHE_TTL", DEFAULT_TTL)
+
+    def entry(self, key):
+        return self.backend.get(key) if self.backend else None
+
+    def store(self, key, body, headers, version=None):
+        """Cache a serialized body under key and return the entry."""
+        entry = {
+            "body": body,
+            "etag": entity_tag(body.encode(), version),
+            "last_modified": int(time.time()),
+            "headers": dict(headers),
+        }
+        if self.backend:
+            self.backend.set(key, entry, self.ttl)
+        return entry
+
+    def respond(self, key, build):
+        """Serve key from the cache, calling build() -> (data, headers[, row version]) on a miss."""
+        entry = self.entry(key)
+        if entry is None:
+            data, headers, *version = build()
+            entry = self.store(key, current_app.json.dumps(data) + "\n", headers, *version)
+
+        response = Response(entry["body"], mimetype="application/json", headers=entry["headers"])
+        response.set_etag(entry["etag"])
+        response.last_modified = entry["last_modified"]
+        return response.make_conditional(request)
+
+    def list_key(self, name, args=None):
+        """Key for a listing under the current query string (or the given (key, value) pairs)."""
+        version = self.backend.counter(name) if self.backend else 0
+        pairs = request.args.items(multi=True) if args is None else args
+        args = "&".join(f"{key}={value}" for key, value in sorted(pairs))
+        return f"{name}:v{version}:{args}"
+
+    def invalidate_list(self, name):
+        if self.backend:
+            self.backend.incr(name)
+
+    def delete(self, *keys):
+        if self.backend:
+            self.backend.delete(*keys)
+
+    def clear(self):
+        if self.backend:
+            self.backend.clear()
+
+
+BOOK_CACHE = ResponseCache()
+
+
+def entity_tag(body, version=None):
+    """Strong ETag for a body; for a single row, prefixed with the row version (`"<version>-<sha1>"`)."""
+    digest = hashlib.sha1(body).hexdigest()
+    return digest if version is None else f"{version}-{digest}"
+
+
+def if_match_versions():
+    """Row versions the request's If-Match allows: None without a precondition (or `*`),
+    else the versions in the listed ETags. Weak tags count, since compression weakens them."""
+    if not request.if_match or request.if_match.star_tag:
+        return None
+    versions = set()
+    for tag in request.if_match.as_set(include_weak=True):
+        version = tag.partition("-")[0]
+        if version.isdigit():
+            versions.add(int(version))
+    return versions
+
+
+def row_response(data, version, status=200):
+    """JSON response for one row, as flask-smorest would write it, with a versioned ETag."""
+    response = current_app.json.response(data)
+    response.status_code = status
+    response.set_etag(entity_tag(response.get_data(), version))
+    return response.make_conditional(request)
+
+
+def book_key(book_id, view):
+    return f"book:{book_id}:{view}"
+
+
+def invalidate_book(book_id=None):
+    """Drop cached book listings and, when given, the detail entries of one book."""
+    BOOK_CACHE.invalidate_list("books")
+    if book_id is not None:
+        BOOK_CACHE.delete(book_key(book_id, "full"), book_key(book_id, "summary"))
@@ -8,11 +8,13 @@ from schemas.auth import AuthRegisterSchema, AuthLoginSchema, PublicUserSchema
 from database import db
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from security.auth import hash_password, verify_password
-from flask_jwt_extended import (create_access_token, jwt_required, get_jwt,
+from security.auth import hash_password, verify_password, needs_rehash
+from flask_jwt_extended import (create_access_token, jwt_required, get_jwt, current_user,
                                 create_refresh_token, get_jwt_identity, set_refresh_cookies)
 
 from blocklist import BLOCKLIST
+from ratelimit import RATE_LIMITER
+from security.tokens import token_claims
 from logging_config import get_module_logger
 
 blp = Blueprint("Auth", __name__)
@@ -21,6 +23,7 @@ logger = get_module_logger(__file__)
 
 @blp.route("/registration")
 class AuthRegistration(MethodView):
+    @RATE_LIMITER.limit("5/minute", key="ip")
     @blp.arguments(AuthRegisterSchema)
     @blp.response(201, PublicUserSchema)
     def post(self, request):
@@ -44,14 +47,15 @@ class AuthRegistration(MethodView):
 
 @blp.route("/login")
 class AuthLogin(MethodView):
+    @RATE_LIMITER.limit("10/minute", key="ip")
     @blp.arguments(AuthLoginSchema)
     def post(self, request):
         user = None
 
         if "username" in request:
-            user = AuthModel.query.filter_by(username=request["username"]).first()
+            user = AuthModel.query.filter_by(username=request["username"], deleted_at=None).first()
         elif "email" in request:
-            user = AuthModel.query.filter_by(email=request["email"]).first()
+            user = AuthModel.query.filter_by(email=request["email"], deleted_at=None).first()
 
         if not user:
             logger.warning("Login failed: User not found.")
@@ -60,8 +64,14 @@ class AuthLogin(MethodView):
             logger.warning(f"Login failed: Incorrect password for user {user.username}.")
             abort(401, message="Incorrect password")
 
-        access_token = create_access_token(identity=str(user.id), additional_claims={"username": user.username})
-        refresh_token = create_refresh_token(identity=str(user.id))
+        if needs_rehash(user.password):
+            user.password = hash_password(request["password"])
+            db.session.commit()
+            logger.info(f"Password hash upgraded for user {user.username}.")
+
+        claims = token_claims(user)
+        access_token = create_access_token(identity=str(user.id), additional_claims=claims)
+        refresh_token = create_refresh_token(identity=str(user.id), additional_claims=claims)
 
         logger.info(f"User {user.username} (ID: {user.id}) logged in successfully.")
 
@@ -74,9 +84,9 @@ class AuthLogin(MethodView):
 class AuthLogout(MethodView):
     @jwt_required(verify_type=False)
     def post(self):
-        jwt = get_jwt()["jti"]
+        jwt = get_jwt()
         user_id = get_jwt_identity()
-        BLOCKLIST.add(jwt)
+        BLOCKLIST.revoke(jwt["jti"], jwt["exp"])
         logger.info(f"User ID {user_id} logged out. Token blacklisted.")
         return {"message": "Logged out"}
 
@@ -85,7 +95,6 @@ class AuthLogout(MethodView):
 class RefreshToken(MethodView):
     @jwt_required(refresh=True)
     def post(self):
-        user_id = get_jwt_identity()
-        new_access_token = create_access_token(identity=user_id)
-        logger.info(f"Access token refreshed for user ID {user_id}.")
+        new_access_token = create_access_token(identity=str(current_user.id), additional_claims=token_claims(current_user))
+        logger.info(f"Access token refreshed for user ID {current_user.id}.")
         return {'access_token': new_access_token}
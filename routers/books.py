@@ -1,49 +1,125 @@
+from datetime import datetime, timedelta, timezone
+
+from flask import Response, current_app, stream_with_context
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 
-from models.auth import AuthModel
+from models.book_comment_days import BookCommentDayModel
 from models.books import BooksModel
-from schemas.books import BookSchema
+from models.comments import CommentsModel
+from schemas.books import BookSchema, BookQueryArgsSchema, BookViewArgsSchema, TopBooksArgsSchema
+from schemas.bulk import BulkResultSchema
+from marshmallow import ValidationError
 
 from database import db
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import selectinload
+
+from pagination import keyset_page, keyset_iter, next_page_headers, wants_ndjson
+from response_cache import BOOK_CACHE, book_key, invalidate_book, row_response
+from serialization import BOOK_SUMMARY_COLUMNS, BOOK_DETAIL_COLUMNS, dump_books, fast_serializer_enabled
+from ownership import owned_write, row_id_or_404
+from bulk import iter_bulk_items, chunked, insert_ignoring_conflicts, item_result
 
 from logging_config import get_module_logger
 
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
 
 blp = Blueprint("Books", __name__)
 logger = get_module_logger(__file__)
 
 
+def books_with_comments():
+    return BooksModel.query.options(
+        selectinload(BooksModel.comments).joinedload(CommentsModel.user)
+    )
+
+
+def book_summaries():
+    return db.session.query(*BOOK_SUMMARY_COLUMNS)
+
+
+def books_for_view(view):
+    return book_summaries() if view == "summary" else books_with_comments()
+
+
+def present_books(books, view):
+    if view != "summary":
+        return books
+    return [dict(book._mapping) for book in books]
+
+
+WINDOW_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+
+def window_start(window):
+    return datetime.now(timezone.utc) - timedelta(**{WINDOW_UNITS[window[-1]]: int(window[:-1])})
+
+
+def window_first_day(window):
+    """The first UTC day of a window in days or weeks; today is its last day."""
+    days = int(window[:-1]) * (7 if window[-1] == "w" else 1)
+    return (datetime.now(timezone.utc) - timedelta(days=days - 1)).date()
+
+
+def stream_books_ndjson(view):
+    schema = BookSchema()
+    fast = fast_serializer_enabled()
+    query = book_summaries() if fast else books_for_view(view)
+
+    def generate():
+        for chunk in keyset_iter(query, BooksModel.id):
+            if fast:
+                books = dump_books(chunk, view)
+            else:
+                books = schema.dump(present_books(chunk, view), many=True)
+            yield "".join(current_app.json.dumps(book) + "\n" for book in books)
+            db.session.expunge_all()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @blp.route("/books")
 class Book(MethodView):
+    @blp.arguments(BookQueryArgsSchema, location="query")
     @blp.response(200, BookSchema(many=True))
-    def get(self):
-        logger.info("GET /books - All books fetched")
-        query = BooksModel.query.all()
-        return query
+    def get(self, args):
+        if wants_ndjson():
+            logger.info("GET /books - Streaming full catalog as NDJSON")
+            return stream_books_ndjson(args["view"])
+
+        fast = fast_serializer_enabled()
+
+        def build():
+            query = book_summaries() if fast else books_for_view(args["view"])
+            try:
+                books, next_cursor = keyset_page(query, BooksModel.id, args["limit"], args.get("cursor"))
+            except ValueError:
+                abort(400, message="Invalid cursor")
+            logger.info(f"GET /books - {len(books)} books fetched")
+            if fast:
+                data = dump_books(books, args["view"])
+            else:
+                data = BookSchema(many=True).dump(present_books(books, args["view"]))
+            return data, next_page_headers(next_cursor, args["limit"])
+
+        return BOOK_CACHE.respond(BOOK_CACHE.list_key("books"), build)
     
     @jwt_required()
     @blp.arguments(BookSchema)
     @blp.response(201, BookSchema)
     def post(self, request):
-        current_user_id = get_jwt_identity()
-        
-        user = AuthModel.query.get(current_user_id)
-        if not user:
-            abort(404, message="User not found")
-            logger.error("User not found")
-
         book = BooksModel(
             name=request["name"],
-            author=user.username,
-            user_id=current_user_id
+            author=current_user.username,
+            user_id=current_user.id
         )
         
         try:
             db.session.add(book)
             db.session.commit()
+            invalidate_book()
             logger.info(f"Book added: {book.name} by {book.author}")
         except IntegrityError:
             logger.warning(f"Book already exists: {book.name}")
@@ -54,55 +130,162 @@ class Book(MethodView):
         return book  
 
 
+@blp.route("/books/top")
+class TopBooks(MethodView):
+    @blp.arguments(TopBooksArgsSchema, location="query")
+    @blp.response(200, BookSchema(many=True))
+    def get(self, args):
+        """Rank books by comments, or by their latest comment with `by=recent`.
+
+        With a `window`, `by=comments` counts only the comments made in its UTC
+        days (so the window is in days or weeks) and `by=recent` keeps the books
+        commented on in it; `comment_count` in the response stays the all-time count.
+        """
+        query = book_summaries()
+        if args["by"] == "comments" and "window" in args:
+            if args["window"].endswith("h"):
+                abort(400, message="Comment counts are kept per day; use a window like 7d or 4w.")
+            # Sums the per-day counters (ix_book_comment_days_day_comments): at most one
+            # row per book and day in the window, however many comments were made.
+            recent = (
+                select(BookCommentDayModel.book_id, func.sum(BookCommentDayModel.comments).label("comments"))
+                .where(BookCommentDayModel.day >= window_first_day(args["window"]))
+                .group_by(BookCommentDayModel.book_id)
+                .having(func.sum(BookCommentDayModel.comments) > 0)
+                .subquery()
+            )
+            query = query.join(recent, recent.c.book_id == BooksModel.id)
+            query = query.order_by(recent.c.comments.desc(), BooksModel.id.desc())
+        elif args["by"] == "comments":
+            query = query.order_by(BooksModel.comment_count.desc(), BooksModel.id.desc())
+        else:
+            if "window" in args:
+                query = query.filter(BooksModel.last_commented_at >= window_start(args["window"]))
+            query = query.filter(BooksModel.last_commented_at.isnot(None))
+            query = query.order_by(BooksModel.last_commented_at.desc(), BooksModel.id.desc())
+        books = query.limit(args["limit"]).all()
+        logger.info(f"GET /books/top - {len(books)} books ranked by {args['by']}")
+        if fast_serializer_enabled():
+            return current_app.json.response(dump_books(books, "summary"))
+        return present_books(books, "summary")
+
+
+@blp.route("/books/bulk")
+class BookBulk(MethodView):
+    @jwt_required()
+    @blp.response(200, BulkResultSchema)
+    def post(self):
+        results = []
+        try:
+            for chunk in chunked(iter_bulk_items()):
+                results.extend(self.insert_chunk(chunk, current_user))
+        except ValueError as e:
+            abort(400, message=str(e))
+
+        created = sum(result["status"] == "created" for result in results)
+        logger.info(f"POST /books/bulk - {created} of {len(results)} books added by {current_user.username}")
+        return {"created": created, "failed": len(results) - created, "results": results}
+
+    @staticmethod
+    def insert_chunk(chunk, user):
+        schema = BookSchema()
+        results, pending, rows = {}, {}, []
+
+        for index, item, error in chunk:
+            if error:
+                results[index] = item_result(index, "invalid", errors=error)
+                continue
+            try:
+                data = schema.load(item)
+            except ValidationError as e:
+                results[index] = item_result(index, "invalid", errors=e.messages)
+                continue
+            if data["name"] in pending:
+                results[index] = item_result(index, "duplicate", errors="A book already exists")
+                continue
+            pending[data["name"]] = index
+            rows.append({"name": data["name"], "author": user.username, "user_id": user.id})
+
+        if rows:
+            statement = insert_ignoring_conflicts(BooksModel, ["name"]).returning(BooksModel.id, BooksModel.name)
+            try:
+                inserted = {name: book_id for book_id, name in db.session.execute(statement, rows)}
+                db.session.commit()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error(f"Database error while bulk inserting books: {str(e)}")
+                inserted = None
+
+            for name, index in pending.items():
+                if inserted is None:
+                    results[index] = item_result(index, "error", errors="Database error")
+                elif name in inserted:
+                    results[index] = item_result(index, "created", id=inserted[name])
+                else:
+                    results[index] = item_result(index, "duplicate", errors="A book already exists")
+            if inserted:
+                invalidate_book()
+
+        return [results[index] for index in sorted(results)]
+
+
 @blp.route("/books/<string:book_id>")
 class BookDetails(MethodView):
+    @blp.arguments(BookViewArgsSchema, location="query")
     @blp.response(200, BookSchema)
-    def get(self, book_id):
-        book = BooksModel.query.get_or_404(book_id)
-        logger.info(f"Book fetched with ID: {book_id}")
-        return book
+    def get(self, args, book_id):
+        if not book_id.isdigit():
+            abort(404)
+        book_id = int(book_id)
+
+        fast = fast_serializer_enabled()
+
+        def build():
+            if fast:
+                book = db.session.query(*BOOK_DETAIL_COLUMNS).filter(BooksModel.id == book_id).first_or_404()
+                logger.info(f"Book fetched with ID: {book_id}")
+                return dump_books([book], args["view"])[0], {}, book.version
+            if args["view"] == "summary":
+                row = db.session.query(*BOOK_DETAIL_COLUMNS).filter(BooksModel.id == book_id).first_or_404()
+                book = present_books([row], "summary")[0]
+            else:
+                book = row = books_with_comments().get_or_404(book_id)
+            logger.info(f"Book fetched with ID: {book_id}")
+            return BookSchema().dump(book), {}, row.version
+
+        return BOOK_CACHE.respond(book_key(book_id, args["view"]), build)
     
     @jwt_required()
     @blp.arguments(BookSchema)
     @blp.response(201, BookSchema)
     def put(self, request, book_id):
-        current_user_id = get_jwt_identity()
-
-        book = BooksModel.query.get_or_404(book_id)
-
-        if book.user_id != int(current_user_id):
-            logger.warning(f"User {current_user_id} unauthorized to update book ID {book_id}")
-            abort(403, message="You cannot update this book.")
-
-        user = AuthModel.query.get(current_user_id)
-        if not user:
-            logger.error("User not found")
-            abort(404, message="User not found")
-
-        old_name, old_author = book.name, book.author
-        book.name = request["name"]
-        book.author = user.username
-        book.user_id = current_user_id
+        book_id = row_id_or_404(book_id)
 
         try:
-            db.session.add(book)
+            book = owned_write(
+                update(BooksModel)
+                .values(name=request["name"], author=current_user.username, version=BooksModel.version + 1)
+                .returning(*BOOK_DETAIL_COLUMNS),
+                BooksModel, book_id, "You cannot update this book.",
+            )
+            data = dump_books([book], "full")[0]
             db.session.commit()
-            logger.info(f"Book updated (ID: {book_id}) - From '{old_name}' by {old_author} to '{book.name}' by {book.author}")
         except SQLAlchemyError as e:
+            db.session.rollback()
             logger.error(f"Error updating book ID {book_id}: {str(e)}")
             abort(400, message="Couldn't update book")
-        return book
+
+        invalidate_book(book_id)
+        logger.info(f"Book updated (ID: {book_id}) to '{book.name}' by {book.author}")
+        return row_response(data, book.version, 201)
 
     @jwt_required()
     def delete(self, book_id):
-        current_user_id = get_jwt_identity()
-        book = BooksModel.query.get_or_404(book_id)
-
-        if book.user_id != int(current_user_id):
-            logger.warning(f"User {current_user_id} unauthorized to delete book ID {book_id}")
-            abort(403, message="You could not delete this book.")
-
-        db.session.delete(book)
+        book_id = row_id_or_404(book_id)
+        book = owned_write(
+            delete(BooksModel).returning(BooksModel.name), BooksModel, book_id, "You could not delete this book."
+        )
         db.session.commit()
-        logger.info(f"Book deleted by user {current_user_id} - ID: {book_id}, Name: {book.name}")
+        invalidate_book(book_id)
+        logger.info(f"Book deleted by user {current_user.id} - ID: {book_id}, Name: {book.name}")
         return {"message": "Book deleted."}
@@ -1,41 +1,86 @@
+from collections import Counter
+
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 
 from models.auth import AuthModel
+from models.book_comment_days import BookCommentDayModel
 from models.books import BooksModel
 from models.comments import CommentsModel
-from schemas.comments import CommentSchema
+from schemas.comments import CommentSchema, CommentPageArgsSchema, CommentQueryArgsSchema
+from schemas.bulk import BulkResultSchema
+from marshmallow import ValidationError
 
 from database import db
+from sqlalchemy import delete, func, insert, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload, contains_eager
+
+from pagination import keyset_page, next_page_headers
+from response_cache import invalidate_book, row_response
+from serialization import comment_rows, dump_comment
+from ownership import owned_write, row_id_or_404
+from ratelimit import RATE_LIMITER
+from bulk import iter_bulk_items, chunked, insert_adding_on_conflict, item_result
 
 from logging_config import get_module_logger
 
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
 
 blp = Blueprint("Comments", __name__)
 logger = get_module_logger(__file__)
 
 
+def adjust_comment_count(book_id, days):
+    """Keep books.comment_count/last_commented_at and book_comment_days in step.
+
+    days maps the UTC day of each added (positive) or removed (negative) comment
+    to its count. Runs inside the caller's transaction.
+    """
+    delta = sum(days.values())
+    values = {"comment_count": BooksModel.comment_count + delta}
+    if delta > 0:
+        values["last_commented_at"] = func.now()
+    db.session.execute(update(BooksModel).where(BooksModel.id == book_id).values(**values))
+    db.session.execute(
+        insert_adding_on_conflict(BookCommentDayModel, ["book_id", "day"], "comments"),
+        [{"book_id": book_id, "day": day, "comments": count} for day, count in days.items()],
+    )
+
+
+def comments_with_users():
+    return CommentsModel.query.options(joinedload(CommentsModel.user))
+
+
+def comment_page(query, args):
+    if "since" in args:
+        query = query.filter(CommentsModel.created_at >= args["since"])
+    try:
+        comments, next_cursor = keyset_page(query, CommentsModel.id, args["limit"], args.get("cursor"))
+    except ValueError:
+        abort(400, message="Invalid cursor")
+    return comments, next_page_headers(next_cursor, args["limit"])
+
+
 @blp.route("/comments")
 class Comments(MethodView):
+    @RATE_LIMITER.limit("120/minute", burst=30)
+    @blp.arguments(CommentQueryArgsSchema, location="query")
     @blp.response(200, CommentSchema(many=True))
-    def get(self):
-        logger.info("GET /comments - All comments fetched")
-        query = CommentsModel.query.all()
-        return query
+    def get(self, args):
+        query = comments_with_users()
+        if "book_id" in args:
+            query = query.filter(CommentsModel.book_id == args["book_id"])
+        if "user_id" in args:
+            query = query.filter(CommentsModel.user_id == args["user_id"])
+        comments, headers = comment_page(query, args)
+        logger.info(f"GET /comments - {len(comments)} comments fetched")
+        return comments, headers
 
     @jwt_required()
     @blp.arguments(CommentSchema)
     @blp.response(201, CommentSchema)
     def post(self, request_data):
-        current_user_id = get_jwt_identity()
-
-        user = AuthModel.query.get(current_user_id)
-        if not user:
-            abort(404, message="User not found")
-            logger.error("User not found")
-
         book = BooksModel.query.get(request_data["book_id"])
 
         if not book:
@@ -45,62 +90,178 @@ class Comments(MethodView):
         comment = CommentsModel(
             comment=request_data["comment"],
             book_id=request_data["book_id"],
-            user_id=current_user_id
+            user_id=current_user.id
         )
 
         try:
             db.session.add(comment)
+            db.session.flush()
+            adjust_comment_count(comment.book_id, {comment.created_at.date(): 1})
+            # The INSERT returned id and created_at; dump before commit expires them. The
+            # commenter is the caller, so the users table is not read.
+            data = dump_comment((comment.id, comment.comment, comment.book_id, comment.user_id,
+                                 current_user.username, comment.created_at))
+            version = comment.version
             db.session.commit()
-            logger.info(f"Comment created on book ID {comment.book_id}: '{comment.comment}'")
+            invalidate_book(data["book_id"])
+            logger.info(f"Comment created on book ID {data['book_id']}: '{data['comment']}'")
         except SQLAlchemyError as e:
             logger.error(f"DB error while creating comment: {str(e)}")
             abort(500, message="Comment əlavə edilərkən xəta baş verdi.")
-        return comment
+        return row_response(data, version, 201)
+
+
+@blp.route("/comments/bulk")
+class CommentsBulk(MethodView):
+    @jwt_required()
+    @blp.response(200, BulkResultSchema)
+    def post(self):
+        current_user_id = current_user.id
+        results = []
+        try:
+            for chunk in chunked(iter_bulk_items()):
+                results.extend(self.insert_chunk(chunk, current_user_id))
+        except ValueError as e:
+            abort(400, message=str(e))
+
+        created = sum(result["status"] == "created" for result in results)
+        logger.info(f"POST /comments/bulk - {created} of {len(results)} comments created by user ID {current_user_id}")
+        return {"created": created, "failed": len(results) - created, "results": results}
+
+    @staticmethod
+    def insert_chunk(chunk, user_id):
+        schema = CommentSchema()
+        results, valid = {}, []
+
+        for index, item, error in chunk:
+            if error:
+                results[index] = item_result(index, "invalid", errors=error)
+                continue
+            try:
+                valid.append((index, schema.load(item)))
+            except ValidationError as e:
+                results[index] = item_result(index, "invalid", errors=e.messages)
+
+        book_ids = {data["book_id"] for _, data in valid}
+        existing = {book_id for (book_id,) in db.session.query(BooksModel.id).filter(BooksModel.id.in_(book_ids))}
+
+        pending, rows = [], []
+        for index, data in valid:
+            if data["book_id"] not in existing:
+                results[index] = item_result(index, "invalid", errors="Book not found.")
+                continue
+            pending.append(index)
+            rows.append({"comment": data["comment"], "book_id": data["book_id"], "user_id": user_id})
+
+        if rows:
+            statement = insert(CommentsModel).returning(
+                CommentsModel.id, CommentsModel.book_id, CommentsModel.created_at, sort_by_parameter_order=True
+            )
+            try:
+                inserted = db.session.execute(statement, rows).all()
+                ids = [row.id for row in inserted]
+                days = {}
+                for row in inserted:
+                    days.setdefault(row.book_id, Counter())[row.created_at.date()] += 1
+                for book_id, counts in days.items():
+                    adjust_comment_count(book_id, counts)
+                db.session.commit()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error(f"DB error while bulk creating comments: {str(e)}")
+                ids = None
+
+            for position, index in enumerate(pending):
+                if ids is None:
+                    results[index] = item_result(index, "error", errors="Database error")
+                else:
+                    results[index] = item_result(index, "created", id=ids[position])
+            if ids:
+                for book_id in {row["book_id"] for row in rows}:
+                    invalidate_book(book_id)
+
+        return [results[index] for index in sorted(results)]
+
+
+@blp.route("/books/<int:book_id>/comments")
+class BookComments(MethodView):
+    @blp.arguments(CommentPageArgsSchema, location="query")
+    @blp.response(200, CommentSchema(many=True))
+    def get(self, args, book_id):
+        query = comments_with_users().filter(CommentsModel.book_id == book_id)
+        comments, headers = comment_page(query, args)
+        if not comments and not db.session.get(BooksModel, book_id):
+            abort(404, message="Book not found.")
+        logger.info(f"GET /books/{book_id}/comments - {len(comments)} comments fetched")
+        return comments, headers
+
+
+@blp.route("/users/<string:username>/comments")
+class UserComments(MethodView):
+    @blp.arguments(CommentPageArgsSchema, location="query")
+    @blp.response(200, CommentSchema(many=True))
+    def get(self, args, username):
+        query = (
+            CommentsModel.query.join(CommentsModel.user)
+            .filter(AuthModel.username == username)
+            .options(contains_eager(CommentsModel.user))
+        )
+        comments, headers = comment_page(query, args)
+        if not comments and not AuthModel.query.filter_by(username=username).first():
+            abort(404, message="User not found.")
+        logger.info(f"GET /users/{username}/comments - {len(comments)} comments fetched")
+        return comments, headers
 
 
 @blp.route("/comment/<string:comment_id>")
 class CommentsDetail(MethodView):
+    @blp.response(200, CommentSchema)
     def get(self, comment_id):
-        comment = CommentsModel.query.get_or_404(comment_id)
+        comment_id = row_id_or_404(comment_id)
+        comment = db.session.execute(
+            comment_rows(CommentsModel.version).where(CommentsModel.id == comment_id)
+        ).first()
+        if comment is None:
+            abort(404)
         logger.info(f"Comment fetched with ID: {comment_id}")
-        return comment
-    
+        return row_response(dump_comment(comment), comment.version)
+
     @jwt_required()
     def delete(self, comment_id):
-        current_user_id = get_jwt_identity()
-
-        comment = CommentsModel.query.get_or_404(comment_id)
-
-        if comment.user_id != int(current_user_id):
-            logger.warning(f"User {current_user_id} unauthorized to delete book ID {comment_id}")
-            abort(403, message="You could not delete this book.")
-
-        db.session.delete(comment)
+        comment_id = row_id_or_404(comment_id)
+        comment = owned_write(
+            delete(CommentsModel).returning(CommentsModel.book_id, CommentsModel.created_at),
+            CommentsModel, comment_id, "You could not delete this comment.",
+        )
+        adjust_comment_count(comment.book_id, {comment.created_at.date(): -1})
         db.session.commit()
+        invalidate_book(comment.book_id)
         logger.info(f"Comment deleted with ID: {comment_id}")
         return {"message": "Comment deleted"}
-    
+
     @jwt_required()
     @blp.arguments(CommentSchema)
     @blp.response(201, CommentSchema)
     def put(self, request, comment_id):
-        current_user_id = get_jwt_identity()
-
-        comment = CommentsModel.query.get_or_404(comment_id)
-
-        if comment.user_id != int(current_user_id):
-            logger.warning(f"User {current_user_id} unauthorized to update comment ID {comment_id}")
-            abort(403, message="You cannot edit this comment.")
-
-
-        old_comment = comment.comment
-        comment.comment = request["comment"]
+        comment_id = row_id_or_404(comment_id)
 
         try:
-            db.session.add(comment)
+            comment = owned_write(
+                update(CommentsModel)
+                .values(comment=request["comment"], version=CommentsModel.version + 1)
+                .returning(CommentsModel.id, CommentsModel.comment, CommentsModel.book_id, CommentsModel.user_id,
+                           CommentsModel.created_at, CommentsModel.version),
+                CommentsModel, comment_id, "You cannot edit this comment.",
+            )
             db.session.commit()
-            logger.info(f"Comment updated (ID: {comment_id}) from '{old_comment}' to '{comment.comment}'")
         except SQLAlchemyError as e:
+            db.session.rollback()
             logger.error(f"Error updating comment ID {comment_id}: {str(e)}")
             abort(400, message="Couldn't update comment")
-        return comment
+
+        invalidate_book(comment.book_id)
+        logger.info(f"Comment updated (ID: {comment_id}) to '{comment.comment}'")
+        # Only the author can get here, so the commenter is the caller.
+        data = dump_comment((comment.id, comment.comment, comment.book_id, comment.user_id,
+                             current_user.username, comment.created_at))
+        return row_response(data, comment.version, 201)
@@ -0,0 +1,113 @@
+import re
+
+from flask.views import MethodView
+from flask_smorest import Blueprint
+from markupsafe import escape
+
+from models.books import BooksModel
+from models.comments import CommentsModel
+from schemas.search import SearchArgsSchema, SearchResultSchema
+
+from database import db
+from sqlalchemy import literal, or_, text, union_all
+
+from logging_config import get_module_logger
+
+blp = Blueprint("Search", __name__)
+logger = get_module_logger(__file__)
+
+# Snippets are HTML: the stored text is escaped and only the highlight tags are markup.
+# ts_headline marks matches with these private-use characters (stripped from the text
+# first), which are swapped for the tags once the rest has been escaped.
+START_SEL, STOP_SEL = "\ue000", "\ue001"
+
+# Full-text hits always outrank trigram-only (typo/prefix) hits on books.
+POSTGRES_SEARCH = text("""
+    WITH q AS (SELECT websearch_to_tsquery('simple', :q) AS query),
+    hits AS (
+        SELECT 'book' AS type, b.id, b.id AS book_id,
+               1 + ts_rank(b.search_vector, q.query) AS rank,
+               b.name || ' by ' || b.author AS body
+        FROM books b, q
+        WHERE b.search_vector @@ q.query
+        UNION ALL
+        SELECT 'book', b.id, b.id,
+               greatest(similarity(b.name, :q), similarity(b.author, :q)),
+               b.name || ' by ' || b.author
+        FROM books b, q
+        WHERE NOT b.search_vector @@ q.query
+          AND (b.name % :q OR b.author % :q OR b.name ILIKE :prefix OR b.author ILIKE :prefix)
+        UNION ALL
+        SELECT 'comment', c.id, c.book_id,
+               1 + ts_rank(c.search_vector, q.query),
+               c.comment
+        FROM comments c, q
+        WHERE c.search_vector @@ q.query
+    ),
+    page AS (
+        SELECT * FROM hits ORDER BY rank DESC, type, id LIMIT :limit OFFSET :offset
+    )
+    SELECT page.type, page.id, page.book_id, page.rank,
+           ts_headline('simple', translate(page.body, :start_sel || :stop_sel, ''), q.query,
+                       'StartSel="' || :start_sel || '", StopSel="' || :stop_sel || '"') AS snippet
+    FROM page, q
+    ORDER BY page.rank DESC, page.type, page.id
+""")
+
+
+def escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def highlight(body, q):
+    """HTML-escape body and wrap the case-insensitive matches of q in <b> tags."""
+    parts = re.split(f"({re.escape(q)})", body, flags=re.IGNORECASE)
+    # re.split puts the matches at the odd positions.
+    return "".join(f"<b>{escape(part)}</b>" if i % 2 else str(escape(part)) for i, part in enumerate(parts))
+
+
+def escape_headline(snippet):
+    return str(escape(snippet)).replace(START_SEL, "<b>").replace(STOP_SEL, "</b>")
+
+
+def search_postgres(q, limit, offset):
+    rows = db.session.execute(POSTGRES_SEARCH, {
+        "q": q, "prefix": escape_like(q) + "%", "limit": limit, "offset": offset,
+        "start_sel": START_SEL, "stop_sel": STOP_SEL,
+    })
+    return [{**row._mapping, "snippet": escape_headline(row.snippet)} for row in rows]
+
+
+def search_like(q, limit, offset):
+    pattern = f"%{escape_like(q)}%"
+    books = db.session.query(
+        literal("book").label("type"), BooksModel.id.label("id"), BooksModel.id.label("book_id"),
+        (BooksModel.name + " by " + BooksModel.author).label("body"),
+    ).filter(or_(BooksModel.name.ilike(pattern, escape="\\"), BooksModel.author.ilike(pattern, escape="\\")))
+    comments = db.session.query(
+        literal("comment").label("type"), CommentsModel.id.label("id"), CommentsModel.book_id.label("book_id"),
+        CommentsModel.comment.label("body"),
+    ).filter(CommentsModel.comment.ilike(pattern, escape="\\"))
+
+    hits = union_all(books, comments).subquery()
+    rows = db.session.execute(
+        db.select(hits).order_by(hits.c.type, hits.c.id).limit(limit).offset(offset)
+    )
+    return [
+        {"type": row.type, "id": row.id, "book_id": row.book_id, "rank": 1.0, "snippet": highlight(row.body, q)}
+        for row in rows
+    ]
+
+
+@blp.route("/search")
+class Search(MethodView):
+    @blp.arguments(SearchArgsSchema, location="query")
+    @blp.response(200, SearchResultSchema(many=True))
+    def get(self, args):
+        offset = (args["page"] - 1) * args["limit"]
+        if db.engine.dialect.name == "postgresql":
+            results = search_postgres(args["q"], args["limit"], offset)
+        else:
+            results = search_like(args["q"], args["limit"], offset)
+        logger.info(f"GET /search - {len(results)} results for '{args['q']}'")
+        return results
@@ -8,14 +8,26 @@ from security.auth import verify_password, hash_password
 from database import db
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 from logging_config import get_module_logger
+from blocklist import BLOCKLIST
+from ratelimit import RATE_LIMITER
+from response_cache import BOOK_CACHE
+from security.tokens import invalidate_tokens
+from jobs import JOBS, utcnow
 
 
 blp = Blueprint("Users", __name__)
 logger = get_module_logger(__file__)
 
+
+def revoke_current_token():
+    """Revoke the presenting token in the shared blocklist; other workers may still
+    trust the old token version for up to TOKEN_VERSION_TTL seconds."""
+    jwt = get_jwt()
+    BLOCKLIST.revoke(jwt["jti"], jwt["exp"])
+
 @blp.route("/profile/<string:username>")
 class UserProfile(MethodView):
     @jwt_required()
@@ -48,14 +60,21 @@ class UserProfile(MethodView):
             logger.warning(f"Unauthorized update attempt! User ID {current_user} tried to update '{username}' profile.")
             abort(403, message="Access denied.")
 
+        renamed = "username" in request and request["username"] != user.username
         if "username" in request:
             user.username = request["username"]
         elif "email" in request:
             user.email = request["email"]
+        if renamed:
+            # Tokens carry the username, so the old ones must stop working.
+            invalidate_tokens(user)
 
         try:
             db.session.add(user)
             db.session.commit()
+            if renamed:
+                revoke_current_token()
+            BOOK_CACHE.clear()
             logger.info(f"User ID {current_user} updated profile '{user.username}' - updated email '{user.email}'")
 
         except SQLAlchemyError:
@@ -78,14 +97,21 @@ class UserProfile(MethodView):
             abort(403, message="Access denied.")
         
 
-        db.session.delete(profile)
+        # The user's comments and books are removed in batches by the delete_account
+        # job; until then the account can no longer log in or use its tokens.
+        profile.deleted_at = utcnow()
+        invalidate_tokens(profile)
+        job = JOBS.enqueue("delete_account", user_id=profile.id)
         db.session.commit()
-        logger.info(f"User ID {current_user} deleted their profile '{username}'.")
+        JOBS.wake()
+        revoke_current_token()
+        logger.info(f"User ID {current_user} scheduled deletion of their profile '{username}' (job {job.id}).")
 
-        return {"message": "Profile deleted"}
+        return {"message": "Profile deletion scheduled", "job_id": job.id}, 202
 
 @blp.route("/profile/<string:username>/changepassword")
 class ChangePassword(MethodView):
+    @RATE_LIMITER.limit("5/minute")
     @jwt_required()
     @blp.arguments(PasswordChange)
     def put(self, request, username):
@@ -102,7 +128,9 @@ class ChangePassword(MethodView):
 
         if verify_password(request["old_password"], user.password):
             user.password = hash_password(request["new_password"])
+            invalidate_tokens(user)
             db.session.commit()
+            revoke_current_token()
             logger.info(f"User ID {current_user_id} changed password for user '{username}'")
             return {"message": "Password changed successfully."}, 200
         else:
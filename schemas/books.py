@@ -1,5 +1,6 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
 from schemas.comments import CommentSchema
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 class BookSchema(Schema):
     id = fields.Str(dump_only=True)
@@ -7,3 +8,17 @@ class BookSchema(Schema):
     author = fields.Str(dump_only=True)
     comments = fields.Nested(CommentSchema, many=True, dump_only=True)
     user_id = fields.Int(dump_only=True)
+    comment_count = fields.Int(dump_only=True)
+    last_commented_at = fields.DateTime(dump_only=True)
+
+class BookViewArgsSchema(Schema):
+    view = fields.Str(load_default="full", validate=validate.OneOf(["full", "summary"]))
+
+class BookQueryArgsSchema(BookViewArgsSchema):
+    limit = fields.Int(load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    cursor = fields.Str()
+
+class TopBooksArgsSchema(Schema):
+    by = fields.Str(load_default="comments", validate=validate.OneOf(["comments", "recent"]))
+    window = fields.Str(validate=validate.Regexp(r"^\d+[hdw]$", error="Use a window like 24h, 7d or 4w."))
+    limit = fields.Int(load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
@@ -0,0 +1,12 @@
+from marshmallow import Schema, fields
+
+class BulkItemResultSchema(Schema):
+    index = fields.Int()
+    status = fields.Str()
+    id = fields.Int()
+    errors = fields.Raw()
+
+class BulkResultSchema(Schema):
+    created = fields.Int()
+    failed = fields.Int()
+    results = fields.Nested(BulkItemResultSchema, many=True)
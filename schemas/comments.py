@@ -1,4 +1,7 @@
-from marshmallow import Schema, fields
+from datetime import timezone
+
+from marshmallow import Schema, fields, validate
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 class CommentSchema(Schema):
     id = fields.Str(dump_only=True)
@@ -6,8 +9,17 @@ class CommentSchema(Schema):
     book_id = fields.Int(required=True)
     user_id = fields.Int(dump_only=True)
     commenter = fields.Method("get_commenter_username", dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
 
 
     def get_commenter_username(self, obj):
         return obj.user.username if obj.user else None
 
+class CommentPageArgsSchema(Schema):
+    limit = fields.Int(load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    cursor = fields.Str()
+    since = fields.NaiveDateTime(timezone=timezone.utc)
+
+class CommentQueryArgsSchema(CommentPageArgsSchema):
+    book_id = fields.Int()
+    user_id = fields.Int()
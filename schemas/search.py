@@ -0,0 +1,14 @@
+from marshmallow import Schema, fields, validate
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+class SearchArgsSchema(Schema):
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=200))
+    limit = fields.Int(load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    page = fields.Int(load_default=1, validate=validate.Range(min=1))
+
+class SearchResultSchema(Schema):
+    type = fields.Str()
+    id = fields.Int()
+    book_id = fields.Int()
+    rank = fields.Float()
+    snippet = fields.Str()
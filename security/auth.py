@@ -1,7 +1,89 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 from passlib.hash import pbkdf2_sha256
 
+# Defaults until init_app() applies the PASSWORD_HASH_* config.
+PASSWORD_HASH_ROUNDS = pbkdf2_sha256.default_rounds
+# Processes per gunicorn worker doing pbkdf2; 0 hashes inline on the request thread.
+PASSWORD_HASH_WORKERS = 2
+# Hashes a worker may run or queue at once before callers are turned away.
+PASSWORD_HASH_MAX_PENDING = 8
+PASSWORD_HASH_QUEUE_TIMEOUT = 2.0
+
+hasher = pbkdf2_sha256.using(rounds=PASSWORD_HASH_ROUNDS)
+
+
+class HashingBusy(Exception):
+    """Raised when no hashing slot frees up within PASSWORD_HASH_QUEUE_TIMEOUT."""
+
+    def __init__(self):
+        super().__init__()
+        self.retry_after = max(1, int(PASSWORD_HASH_QUEUE_TIMEOUT))
+
+
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def init_app(app):
+    global PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_QUEUE_TIMEOUT
+    global hasher, _slots, _executor
+    PASSWORD_HASH_ROUNDS = app.config.get("PASSWORD_HASH_ROUNDS") or pbkdf2_sha256.default_rounds
+    PASSWORD_HASH_WORKERS = app.config.get("PASSWORD_HASH_WORKERS", PASSWORD_HASH_WORKERS)
+    PASSWORD_HASH_MAX_PENDING = app.config.get("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_MAX_PENDING)
+    PASSWORD_HASH_QUEUE_TIMEOUT = app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", PASSWORD_HASH_QUEUE_TIMEOUT)
+    hasher = pbkdf2_sha256.using(rounds=PASSWORD_HASH_ROUNDS)
+    _slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+    with _executor_lock:
+        # The pool is sized from the settings above, so build it again on first use.
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    # A pool inherited through fork() is unusable, so each worker builds its own.
+    # Its processes are spawned rather than forked: the worker already runs the
+    # log writer and job threads, whose locks a forked child could inherit held.
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                                                mp_context=multiprocessing.get_context("spawn"))
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _hash(password):
+    return hasher.hash(password)
+
+
+def _verify(password, hashed_password):
+    return hasher.verify(password, hashed_password)
+
+
+def _run(func, *args):
+    if not _slots.acquire(timeout=PASSWORD_HASH_QUEUE_TIMEOUT):
+        raise HashingBusy()
+    try:
+        if PASSWORD_HASH_WORKERS <= 0:
+            return func(*args)
+        return _get_executor().submit(func, *args).result()
+    finally:
+        _slots.release()
+
+
 def hash_password(password):
-    return pbkdf2_sha256.hash(password)
+    return _run(_hash, password)
 
 def verify_password(password, hashed_password):
-    return pbkdf2_sha256.verify(password, hashed_password)
\ No newline at end of file
+    return _run(_verify, password, hashed_password)
+
+def needs_rehash(hashed_password):
+    return hasher.needs_update(hashed_password)
@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from flask import g
+
+from database import db
+from models.auth import AuthModel
+
+# Seconds a worker trusts a user's token version before reading it again (TOKEN_VERSION_TTL
+# config). A rename, password change or deletion in another worker takes up to this long to reach it.
+TOKEN_VERSION_TTL = 30
+TOKEN_VERSION_CACHE_SIZE = 10000
+
+RequestUser = namedtuple("RequestUser", ["id", "username", "token_version"])
+
+
+class TokenVersionCache:
+    """Bounded id -> (token_version, expires_at) map with a TTL."""
+
+    def __init__(self, ttl=TOKEN_VERSION_TTL, maxsize=TOKEN_VERSION_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get("TOKEN_VERSION_TTL", TOKEN_VERSION_TTL)
+        self.clear()
+
+    def get(self, user_id):
+        with self._lock:
+            item = self._data.get(user_id)
+            if item is None or item[1] <= time.monotonic():
+                return None
+            return item[0]
+
+    def set(self, user_id, version):
+        with self._lock:
+            self._data[user_id] = (version, time.monotonic() + self.ttl)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+TOKEN_VERSIONS = TokenVersionCache()
+
+
+def token_claims(user):
+    return {"username": user.username, "ver": user.token_version}
+
+
+def current_token_version(user_id):
+    """The user's token version, or None when the user no longer exists."""
+    version = TOKEN_VERSIONS.get(user_id)
+    if version is None:
+        version = db.session.execute(
+            db.select(AuthModel.token_version).where(AuthModel.id == user_id)
+        ).scalar_one_or_none()
+        if version is not None:
+            TOKEN_VERSIONS.set(user_id, version)
+    return version
+
+
+def load_request_user(jwt_data):
+    """Resolve the caller from the token claims, or None when the token is stale.
+
+    Tokens carrying a username and version are trusted once the version matches
+    the (cached) current one; older tokens fall back to loading the user. The
+    result is memoized for the request, so the users table is read at most once.
+    """
+    memo = g.get("request_user")
+    if memo is not None and memo[0] == jwt_data["jti"]:
+        return memo[1]
+
+    user_id = int(jwt_data["sub"])
+    if "ver" in jwt_data and "username" in jwt_data:
+        version = current_token_version(user_id)
+        user = RequestUser(user_id, jwt_data["username"], version) if version == jwt_data["ver"] else None
+    else:
+        row = db.session.get(AuthModel, user_id)
+        user = RequestUser(row.id, row.username, row.token_version) if row and row.deleted_at is None else None
+
+    g.request_user = (jwt_data["jti"], user)
+    return user
+
+
+def invalidate_tokens(user):
+    """Bump the user's token version so every token issued before now stops working.
+
+    Call before committing the change that requires it.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    TOKEN_VERSIONS.discard(user.id)
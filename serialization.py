@@ -0,0 +1,86 @@
+"""Marshmallow-free serialization for the book read paths.
+
+dump_books() turns column-select rows into the exact dicts BookSchema would dump
+(same keys, same order, same value conversions), so the JSON written from them
+is byte-for-byte what the schema path produces. benchmarks/serialization.py
+checks that and measures both paths. Enable it per endpoint with
+FAST_SERIALIZER_ENDPOINTS, e.g. `Books.Book,Books.BookDetails` or `all`.
+"""
+from flask import current_app, request
+from sqlalchemy import select
+
+from database import db
+from models.auth import AuthModel
+from models.books import BooksModel
+from models.comments import CommentsModel
+
+BOOK_SUMMARY_COLUMNS = (
+    BooksModel.id, BooksModel.name, BooksModel.author, BooksModel.user_id,
+    BooksModel.comment_count, BooksModel.last_commented_at,
+)
+# Single-book reads also need the row version for the ETag; dump_books ignores it.
+BOOK_DETAIL_COLUMNS = (*BOOK_SUMMARY_COLUMNS, BooksModel.version)
+
+
+def fast_serializer_enabled():
+    endpoints = current_app.config.get("FAST_SERIALIZER_ENDPOINTS", ())
+    return "all" in endpoints or request.endpoint in endpoints
+
+
+def _iso(value):
+    return None if value is None else value.isoformat()
+
+
+def dump_comment(row):
+    comment_id, comment, book_id, user_id, commenter, created_at, *_ = row
+    return {
+        "id": str(comment_id),
+        "comment": comment,
+        "book_id": book_id,
+        "user_id": user_id,
+        "commenter": commenter,
+        "created_at": _iso(created_at),
+    }
+
+
+def comment_rows(*extra_columns):
+    """Column select for dump_comment, with the commenter's username joined in."""
+    return select(
+        CommentsModel.id, CommentsModel.comment, CommentsModel.book_id, CommentsModel.user_id,
+        AuthModel.username, CommentsModel.created_at, *extra_columns,
+    ).outerjoin(AuthModel, AuthModel.id == CommentsModel.user_id)
+
+
+def comments_for_books(book_ids):
+    """The comments of every book in one query, in the order the relationship loads them."""
+    return comment_rows().where(CommentsModel.book_id.in_(book_ids)).order_by(CommentsModel.id)
+
+
+def group_comments(rows, book_ids):
+    grouped = {book_id: [] for book_id in book_ids}
+    for row in rows:
+        grouped[row[2]].append(dump_comment(row))
+    return grouped
+
+
+def comments_by_book(book_ids):
+    return group_comments(db.session.execute(comments_for_books(book_ids)), book_ids)
+
+
+def dump_books(rows, view, comments=None):
+    """Dump BOOK_SUMMARY_COLUMNS rows; the full view adds each book's comments.
+
+    comments maps book id to dumped comments; it is queried here when not given.
+    """
+    if view == "full" and comments is None:
+        comments = comments_by_book([row[0] for row in rows]) if rows else {}
+    books = []
+    for book_id, name, author, user_id, comment_count, last_commented_at, *_ in rows:
+        book = {"id": str(book_id), "name": name, "author": author}
+        if view == "full":
+            book["comments"] = comments[book_id]
+        book["user_id"] = user_id
+        book["comment_count"] = comment_count
+        book["last_commented_at"] = _iso(last_commented_at)
+        books.append(book)
+    return books
@@ -0,0 +1,84 @@
+"""Fixtures shared by the test suite.
+
+The app is built once with TestConfig (in-memory SQLite unless TEST_DATABASE_URL
+is set) and every test gets a freshly created schema.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# logging_config writes Logs/ under the working directory; keep test runs out of the tracked one.
+os.chdir(tempfile.mkdtemp())
+
+import pytest  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from main import create_app  # noqa: E402
+from database import db  # noqa: E402
+from logging_config import LOG_WRITER  # noqa: E402
+from models import AuthModel  # noqa: E402
+from benchmarks.harness import seed  # noqa: E402
+from security.tokens import current_token_version, token_claims  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    return create_app("test")
+
+
+@pytest.fixture
+def database(app):
+    with app.app_context():
+        db.create_all()
+        yield db
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app, database):
+    return app.test_client()
+
+
+@pytest.fixture
+def statements(database):
+    """SQL statements sent to the primary database; clear() it before the part under test."""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def auth_headers(database):
+    """Build an Authorization header for a user id, as /login would issue it."""
+
+    def headers_for(user_id):
+        user = db.session.get(AuthModel, user_id)
+        token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
+        return {"Authorization": f"Bearer {token}"}
+
+    return headers_for
+
+
+@pytest.fixture
+def author_headers(client, auth_headers):
+    """Seed the benchmark catalog and return headers for user 2, whose token version is cached.
+
+    Book 1 and comment 1 belong to user 2. Tests of a cold cache clear TOKEN_VERSIONS themselves.
+    """
+    seed(10, 50, 2)
+    current_token_version(2)
+    return auth_headers(2)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Flush queued log records while pytest's captured stderr is still open.
+    LOG_WRITER.stop()
@@ -0,0 +1,84 @@
+import asyncio
+import itertools
+import json
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+import main
+from database import db, engine_options_from_env
+from models import AuthModel, BooksModel, CommentsModel
+from replicas import REPLICAS, replica_binds
+
+pytest.importorskip("a2wsgi")
+pytest.importorskip("aiosqlite")
+
+
+def catalog_db(url, comment):
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(AuthModel), {"id": 1, "username": "reader", "email": "r@example.com", "password": "x"})
+        connection.execute(insert(BooksModel), {"id": 1, "name": "book", "author": "reader", "user_id": 1})
+        connection.execute(insert(CommentsModel), {"id": 1, "comment": comment, "book_id": 1, "user_id": 1})
+    engine.dispose()
+
+
+@pytest.fixture
+def async_app(app, tmp_path, monkeypatch):
+    """Yields a function that builds the async read app over a primary and one replica at replica_url."""
+    monkeypatch.setattr(main, "_app", app)
+    from asgi import AsyncReadApp
+
+    built = []
+
+    def build(replica_url):
+        primary_url = f"sqlite:///{tmp_path / 'primary.db'}"
+        catalog_db(primary_url, "from the primary")
+        # Only the async engines read these; the Flask app keeps its own.
+        monkeypatch.setitem(app.config, "SQLALCHEMY_DATABASE_URI", primary_url)
+        monkeypatch.setitem(app.config, "SQLALCHEMY_BINDS", replica_binds([replica_url], engine_options_from_env))
+        monkeypatch.setattr(REPLICAS, "names", ["replica0"])
+        monkeypatch.setattr(REPLICAS, "_cycle", itertools.cycle(["replica0"]))
+        monkeypatch.setattr(REPLICAS, "_down_until", {})
+        built.append(AsyncReadApp(app))
+        return built[-1]
+
+    yield build
+    for async_app in built:
+        asyncio.run(async_app.stop())
+
+
+async def get(app, path):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": [], "scheme": "http"}
+    await app(scope, receive, send)
+    return messages[0]["status"], json.loads(messages[-1]["body"])
+
+
+def test_async_reads_go_to_a_replica(async_app, tmp_path):
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    catalog_db(replica_url, "from the replica")
+    app = async_app(replica_url)
+
+    status, body = asyncio.run(get(app, "/comment/1"))
+
+    assert status == 200
+    assert body["comment"] == "from the replica"
+
+
+def test_async_reads_retry_on_the_primary_when_a_replica_fails(async_app, tmp_path):
+    app = async_app(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    status, body = asyncio.run(get(app, "/comment/1"))
+
+    assert status == 200
+    assert body["comment"] == "from the primary"
+    assert REPLICAS.is_down("replica0")
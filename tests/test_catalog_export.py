@@ -0,0 +1,44 @@
+import catalog
+from benchmarks.harness import seed
+from database import db
+from models import CommentsModel
+
+
+class Interrupted(Exception):
+    pass
+
+
+def export(app, directory, *args):
+    return app.test_cli_runner().invoke(args=["catalog", "export", "--dir", str(directory), "--table", "comments", *args])
+
+
+def test_resumed_export_matches_a_full_one_across_multiline_rows(app, database, tmp_path, monkeypatch):
+    seed(5, 10, 3)
+    for comment in db.session.query(CommentsModel):
+        comment.comment = f'line one of {comment.id}\n"quoted" line two,\nline three'
+    db.session.commit()
+    monkeypatch.setattr(catalog, "BATCH_SIZE", 4)
+
+    assert export(app, tmp_path / "full").exit_code == 0
+    expected = (tmp_path / "full" / "comments.csv").read_text()
+
+    # Stop after the second batch, leaving buffered rows and half a multi-line row behind it.
+    save_checkpoint, saved = catalog.save_checkpoint, []
+
+    def interrupt(path, last_id, offset):
+        save_checkpoint(path, last_id, offset)
+        saved.append(last_id)
+        if len(saved) == 3:
+            raise Interrupted
+
+    monkeypatch.setattr("cli.save_checkpoint", interrupt)
+    assert isinstance(export(app, tmp_path / "partial").exception, Interrupted)
+    with open(tmp_path / "partial" / "comments.csv", "a", newline="") as file:
+        file.write('29,"line one of 29\n"quoted" li')
+    monkeypatch.setattr("cli.save_checkpoint", save_checkpoint)
+
+    result = export(app, tmp_path / "partial", "--resume", "comments")
+
+    assert result.exit_code == 0, result.output
+    assert f"resuming after id {saved[-1]}" in result.output
+    assert (tmp_path / "partial" / "comments.csv").read_text() == expected
@@ -0,0 +1,35 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.cold_start import DEFAULT_BUDGET_MS, ROOT, measure
+
+# Builds the app against a Postgres URL nothing listens on, so any connection attempt fails.
+LAZY_PROBE = """
+import json, sys
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+connections = []
+event.listen(Engine, "engine_connect", connections.append)
+import main
+main.create_app("prod")
+print(json.dumps({"connections": len(connections), "modules": sorted(set(sys.modules) & {"alembic", "flask_migrate"})}))
+"""
+
+
+def test_cold_start_is_within_budget(monkeypatch):
+    # main loads .env into this process; time the probe against SQLite, not that database.
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    runs = [measure("prod") for _ in range(3)]
+    total = statistics.median(run["import_ms"] + run["create_app_ms"] for run in runs)
+    assert total <= DEFAULT_BUDGET_MS, f"import main + create_app() took {total:.0f} ms"
+
+
+def test_create_app_connects_to_nothing_and_skips_migrations():
+    env = dict(os.environ, DATABASE_URL="postgresql+psycopg2://nobody@127.0.0.1:1/none", JWT_SECRET_KEY="x" * 32)
+    env.pop("FLASK_RUN_FROM_CLI", None)
+    result = subprocess.run([sys.executable, "-c", LAZY_PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == {"connections": 0, "modules": []}
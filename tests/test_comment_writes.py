@@ -0,0 +1,25 @@
+from security.tokens import TOKEN_VERSIONS
+
+
+def users_reads(statements):
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+def test_posting_a_comment_does_not_read_the_users_table(client, statements, author_headers):
+    statements.clear()
+    response = client.post("/comments", json={"comment": "new", "book_id": 3}, headers=author_headers)
+
+    assert response.status_code == 201
+    assert response.json["commenter"] == "user-2"
+    assert not users_reads(statements), "\n".join(statements)
+
+
+def test_posting_a_comment_on_a_cold_cache_reads_the_users_table_once(client, statements, author_headers):
+    TOKEN_VERSIONS.clear()
+
+    statements.clear()
+    response = client.post("/comments", json={"comment": "new", "book_id": 3}, headers=author_headers)
+
+    assert response.status_code == 201
+    assert response.json["commenter"] == "user-2"
+    assert len(users_reads(statements)) == 1, "\n".join(statements)
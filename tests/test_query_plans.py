@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.harness import seed
+from benchmarks.query_plans import HOT_ENDPOINTS, endpoint_statements, explain, migrate, unmigrate
+from database import db
+
+
+@pytest.fixture(scope="module")
+def catalog(app):
+    # Built by the migrations, so the indexes checked are the ones production gets.
+    # Large enough that PostgreSQL (TEST_DATABASE_URL) prefers an index when one exists.
+    migrate(app)
+    with app.app_context():
+        seed(100, 5000, 10)
+        db.session.remove()
+    yield
+    unmigrate(app)
+
+
+@pytest.mark.parametrize("name", HOT_ENDPOINTS)
+def test_hot_comment_read_uses_an_index(app, catalog, name):
+    statements = endpoint_statements(app, HOT_ENDPOINTS[name])
+    assert statements, f"GET {HOT_ENDPOINTS[name]} no longer reads comments; update HOT_ENDPOINTS"
+    with app.app_context():
+        for statement, parameters in statements:
+            scans, plan = explain(statement, parameters)
+            assert not scans, f"{name} scans the comments table:\n{statement}\n{plan}"
@@ -0,0 +1,37 @@
+from database import db
+from models import AuthModel, BooksModel
+from security.tokens import TOKEN_VERSIONS
+
+
+def add_user_with_book():
+    user = AuthModel(username="reader", email="reader@example.com", password="unused")
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(BooksModel(name="book", author=user.username, user_id=user.id))
+    db.session.commit()
+    return user.id
+
+
+def test_logging_an_authenticated_request_adds_no_sql(client, statements, auth_headers):
+    headers = auth_headers(add_user_with_book())
+    TOKEN_VERSIONS.clear()  # a cold cache must not cost a users query either
+
+    statements.clear()
+    assert client.get("/books/1").status_code == 200
+    anonymous = list(statements)
+
+    statements.clear()
+    assert client.get("/books/1", headers=headers).status_code == 200
+    assert statements == anonymous
+
+
+def test_logging_an_invalid_token_adds_no_sql(client, statements):
+    add_user_with_book()
+
+    statements.clear()
+    client.get("/books/1")
+    anonymous = list(statements)
+
+    statements.clear()
+    assert client.get("/books/1", headers={"Authorization": "Bearer not-a-token"}).status_code == 200
+    assert statements == anonymous
@@ -0,0 +1,21 @@
+from database import db
+from models import AuthModel, BooksModel, CommentsModel
+
+
+def test_snippets_escape_stored_text_and_only_add_highlight_tags(client):
+    user = AuthModel(username="writer", email="writer@example.com", password="unused")
+    db.session.add(user)
+    db.session.flush()
+    book = BooksModel(name="Dune <i>", author=user.username, user_id=user.id)
+    db.session.add(book)
+    db.session.flush()
+    db.session.add(CommentsModel(comment='<img src=x onerror="alert(1)"> loved dune', book_id=book.id, user_id=user.id))
+    db.session.commit()
+
+    response = client.get("/search?q=dune")
+
+    assert response.status_code == 200
+    assert [hit["snippet"] for hit in response.json] == [
+        "<b>Dune</b> &lt;i&gt; by writer",
+        "&lt;img src=x onerror=&#34;alert(1)&#34;&gt; loved <b>dune</b>",
+    ]
@@ -0,0 +1,52 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.harness import seed
+from database import db
+from models import AuthModel, BookCommentDayModel, BooksModel, CommentsModel
+
+
+def add_book_with_comments(user, name, ages):
+    """A book with one comment per age (a timedelta before now)."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    book = BooksModel(name=name, author=user.username, user_id=user.id, comment_count=len(ages),
+                      last_commented_at=now - min(ages))
+    db.session.add(book)
+    db.session.flush()
+    db.session.add_all(CommentsModel(comment=f"on {name}", book_id=book.id, user_id=user.id, created_at=now - age)
+                       for age in ages)
+    db.session.add_all(BookCommentDayModel(book_id=book.id, day=day, comments=count)
+                       for day, count in Counter((now - age).date() for age in ages).items())
+    return book
+
+
+def test_windowed_ranking_counts_only_comments_in_the_window(client):
+    user = AuthModel(username="reader", email="reader@example.com", password="unused")
+    db.session.add(user)
+    db.session.flush()
+    add_book_with_comments(user, "old favourite", [timedelta(days=30)] * 5 + [timedelta(days=1)])
+    add_book_with_comments(user, "new release", [timedelta(hours=2)] * 3)
+    add_book_with_comments(user, "forgotten", [timedelta(days=60)] * 9)
+    db.session.commit()
+
+    all_time = client.get("/books/top?by=comments").json
+    this_week = client.get("/books/top?by=comments&window=7d").json
+
+    assert [book["name"] for book in all_time] == ["forgotten", "old favourite", "new release"]
+    assert [book["name"] for book in this_week] == ["new release", "old favourite"]
+
+
+def test_windowed_ranking_follows_comment_writes(client, auth_headers):
+    # Every seeded book has 2 comments today; comment 3 is on book 2.
+    seed(10, 3, 2)
+    headers = auth_headers(2)
+
+    client.post("/comments", json={"comment": "new", "book_id": 3}, headers=headers)
+    client.delete("/comment/3", headers=auth_headers(db.session.get(CommentsModel, 3).user_id))
+
+    ranked = client.get("/books/top?by=comments&window=1d").json
+    assert [(book["id"], book["comment_count"]) for book in ranked] == [("3", 3), ("1", 2), ("2", 1)]
+
+
+def test_windowed_comment_ranking_needs_whole_days(client):
+    assert client.get("/books/top?by=comments&window=24h").status_code == 400
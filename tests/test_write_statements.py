@@ -0,0 +1,26 @@
+import pytest
+
+from security.tokens import TOKEN_VERSIONS
+from benchmarks.write_statements import CASES
+
+
+@pytest.mark.parametrize("cache", ["warm", "cold"])
+@pytest.mark.parametrize("label, method, path, body, if_match, expected, budget", CASES, ids=[case[0] for case in CASES])
+def test_write_stays_within_its_statement_budget(client, statements, author_headers, cache,
+                                                 label, method, path, body, if_match, expected, budget):
+    headers = dict(author_headers)
+    if if_match:
+        etag = client.get(path).headers["ETag"]
+        headers["If-Match"] = etag if if_match == "current" else '"0-stale"'
+    if cache == "cold":
+        # A cold token version cache costs one read of the users table, and only one.
+        TOKEN_VERSIONS.clear()
+        budget += 1
+
+    statements.clear()
+    response = client.open(path, method=method, json=body, headers=headers)
+
+    assert response.status_code == expected
+    assert len(statements) <= budget, "\n".join(statements)
+    assert len([statement for statement in statements if "FROM users" in statement]) <= int(cache == "cold"), \
+        "\n".join(statements)